@@ -0,0 +1,187 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: This code implements an AsyncHashMap class, an asyncio
+#               facade over the separate chaining or open addressing
+#               HashMap. Resizes go through the maps' incremental
+#               migration and long operations give the event loop a turn
+#               every step buckets or entries, so no call holds the loop
+#               for longer than one step.
+
+import asyncio
+
+from a6_include import DynamicArray, hash_function_1
+from hash_map_sc import HashMap
+
+
+class AsyncHashMap:
+    def __init__(self, map_type: type = HashMap, capacity: int = 11,
+                 function: callable = hash_function_1, step: int = 1000,
+                 **options) -> None:
+        """
+        Initialize a facade over a new incremental map_type HashMap, built
+        with capacity, function and any other keyword options. Long
+        operations yield to the event loop after every step buckets moved
+        or entries visited.
+        The map is not safe to share between threads; share the facade
+        between tasks of one event loop instead. It is always incremental,
+        so incremental may only be given as True.
+        """
+        if step < 1:
+            raise ValueError("step must be at least 1")
+        if not options.pop('incremental', True):
+            raise ValueError("AsyncHashMap needs an incremental map")
+        self._map = map_type(capacity, function, incremental=True,
+                             **options)
+        self._step = step
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Return the current hash table load factor.
+        """
+        return self._map.table_load()
+
+    async def _drain(self) -> None:
+        """
+        Finish any resize in progress, step old buckets at a time, giving
+        the event loop a turn between steps.
+        """
+        while self._map.migrate_buckets(self._step):
+            await asyncio.sleep(0)
+
+    async def put(self, key: str, value: object) -> None:
+        """
+        Update the key/value pair in the hash map. If key already exists,
+        the associated value is replaced with new value. If not, both key
+        and value is added. A resize it sets off runs incrementally.
+        """
+        self._map.put(key, value)
+
+    async def get(self, key: str) -> object:
+        """
+        Return the value associated with the given key. Return None if key
+        is not in hash map.
+        """
+        return self._map.get(key)
+
+    async def contains_key(self, key: str) -> bool:
+        """
+        Return True if key is in hash map and False otherwise.
+        """
+        return self._map.contains_key(key)
+
+    async def remove(self, key: str) -> None:
+        """
+        Remove key and value from hash map. If not found, do nothing.
+        """
+        self._map.remove(key)
+
+    async def put_many(self, pairs) -> None:
+        """
+        Put every (key, value) pair of a DynamicArray or other iterable,
+        giving the event loop a turn after every step pairs.
+        """
+        # Plain puts, not the map's put_many: its single up-front resize
+        # would move the whole table at once.
+        put = self._map.put
+        for count, (key, value) in enumerate(pairs, 1):
+            put(key, value)
+            if count % self._step == 0:
+                await asyncio.sleep(0)
+
+    async def get_many(self, keys) -> DynamicArray:
+        """
+        Return a dynamic array with the value of each key of a DynamicArray
+        or other iterable, in order, with None for keys not in hash map,
+        giving the event loop a turn after every step keys.
+        """
+        keys = list(keys)
+        values = []
+        for start in range(0, len(keys), self._step):
+            values.extend(self._map.get_many(keys[start:start + self._step]))
+            await asyncio.sleep(0)
+        return DynamicArray(values)
+
+    async def resize(self, new_capacity: int) -> None:
+        """
+        Change the capacity of table like the map's resize_table, moving
+        step old buckets at a time and giving the event loop a turn
+        between steps. Other tasks can keep using the map meanwhile.
+        """
+        await self._drain()
+        self._map.start_resize(new_capacity)
+        await self._drain()
+
+    async def empty_buckets(self) -> int:
+        """
+        Return the number of empty buckets, once any resize in progress is
+        finished.
+        """
+        await self._drain()
+        return self._map.empty_buckets()
+
+    async def clear(self) -> None:
+        """
+        Clear the contents of hash map.
+        """
+        self._map.clear()
+
+    async def items(self):
+        """
+        Yield the (key, value) pairs in hash map, giving the event loop a
+        turn after every step pairs. Another task changing the map while
+        the iteration is waiting for its turn makes it raise RuntimeError.
+        """
+        await self._drain()
+        for count, pair in enumerate(self._map.items(), 1):
+            yield pair
+            if count % self._step == 0:
+                await asyncio.sleep(0)
+
+    def __aiter__(self):
+        """
+        Enable async for loops over the (key, value) pairs in hash map.
+        """
+        return self.items()
+
+    async def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array with tuples of key/value pairs stored in
+        the hash map, giving the event loop a turn after every step pairs.
+        """
+        return DynamicArray([pair async for pair in self.items()])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import hash_map_oa
+
+    async def example() -> None:
+        for map_type in (HashMap, hash_map_oa.HashMap):
+            m = AsyncHashMap(map_type, 11, step=16)
+            await m.put_many(('key' + str(i), i) for i in range(100))
+            await m.resize(500)
+            await m.remove('key0')
+            print(m.get_size(), m.get_capacity(), await m.get('key99'),
+                  await m.contains_key('key0'), await m.empty_buckets())
+            total = 0
+            async for key, value in m:
+                total += value
+            print(total, (await m.get_keys_and_values()).length())
+
+    print("\nasync put_many / resize example 1")
+    print("---------------------------------")
+    asyncio.run(example())
@@ -0,0 +1,951 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Benchmarks for the separate chaining and open addressing
+#               HashMap implementations. Run one or more benchmarks by name,
+#               e.g. "python hash_map_bench.py incremental_resize", or all
+#               of them with no arguments.
+
+import asyncio
+import csv
+import datetime
+import gc
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+import hash_map_async
+import hash_map_compact
+import hash_map_concurrent
+import hash_map_oa
+import hash_map_sc
+import hash_map_sharded
+import hash_map_stream
+from a6_include import (DynamicArray, KeyedHashFunction, growth_prime,
+                        hash_function_1, hash_function_2,
+                        hash_function_builtin, hash_function_fnv1a,
+                        next_prime)
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    """
+    Return the value at the given fraction of the sorted samples.
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _put_latencies(m, keys: list) -> list:
+    """
+    Put every key into m and return the latency of each put in
+    microseconds. The garbage collector is paused so its passes don't
+    show up as resize stalls.
+    """
+    latencies = []
+    clock = time.perf_counter
+    gc.disable()
+    try:
+        for key in keys:
+            start = clock()
+            m.put(key, key)
+            latencies.append((clock() - start) * 1e6)
+    finally:
+        gc.enable()
+    return latencies
+
+
+def bench_incremental_resize(n: int = 200000) -> None:
+    """
+    Compare per-put latency of stop-the-world and incremental resizing
+    while a map grows from its initial capacity to n keys.
+    """
+    keys = ['key' + str(i) for i in range(n)]
+    print(f"{'map':<22}{'total s':>10}{'p50 us':>10}{'p99 us':>10}"
+          f"{'max us':>12}")
+    for name, factory in (
+            ('oa', lambda: hash_map_oa.HashMap(11, hash)),
+            ('oa incremental', lambda: hash_map_oa.HashMap(
+                11, hash, incremental=True)),
+            ('sc', lambda: hash_map_sc.HashMap(11, hash)),
+            ('sc incremental', lambda: hash_map_sc.HashMap(
+                11, hash, incremental=True))):
+        latencies = _put_latencies(factory(), keys)
+        print(f"{name:<22}{sum(latencies) / 1e6:>10.3f}"
+              f"{_percentile(latencies, 0.5):>10.2f}"
+              f"{_percentile(latencies, 0.99):>10.2f}"
+              f"{max(latencies):>12.1f}")
+
+
+def _map_bytes(factory, keys: list) -> tuple:
+    """
+    Build a map with factory and fill it with keys. Return the map and the
+    bytes it holds, not counting the keys and values themselves.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        m = factory()
+        for key in keys:
+            m.put(key, key)
+        return m, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_compact_memory(n: int = 200000) -> None:
+    """
+    Report memory per entry of the HashEntry based open addressing map and
+    the compact parallel array map at n keys.
+    """
+    keys = ['key' + str(i) for i in range(n)]
+    print(f"{'map':<22}{'capacity':>10}{'bytes/entry':>14}")
+    for name, factory in (
+            ('oa', lambda: hash_map_oa.HashMap(11, hash)),
+            ('compact', lambda: hash_map_compact.HashMap(11, hash))):
+        m, size = _map_bytes(factory, keys)
+        print(f"{name:<22}{m.get_capacity():>10}{size / n:>14.1f}")
+
+
+def bench_slots_memory(n: int = 1000000) -> None:
+    """
+    Report memory per entry of both maps at n keys, built from the default
+    classes and from their __slots__ variants.
+    """
+    keys = ['key' + str(i) for i in range(n)]
+    print(f"{'map':<22}{'capacity':>10}{'bytes/entry':>14}{'saved':>10}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        baseline = None
+        for slots in (False, True):
+            m, size = _map_bytes(
+                lambda: module.HashMap(11, hash, slots=slots), keys)
+            baseline = baseline or size
+            label = name + (' slots' if slots else '')
+            print(f"{label:<22}{m.get_capacity():>10}{size / n:>14.1f}"
+                  f"{(baseline - size) / n:>10.1f}")
+
+
+def _counted(function) -> tuple:
+    """
+    Wrap a hash function. Return the wrapper and a one element list that
+    counts its calls.
+    """
+    calls = [0]
+
+    def wrapper(key):
+        calls[0] += 1
+        return function(key)
+    return wrapper, calls
+
+
+def bench_cached_hash(n: int = 20000, length: int = 256) -> None:
+    """
+    Time resize_table and lookups of absent keys for n random string keys
+    of the given length hashed with hash_function_2, and count how many
+    times the hash function runs during the resize.
+    """
+    rng = random.Random(261)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    keys = [''.join(rng.choices(alphabet, k=length)) for _ in range(n)]
+    missing = [''.join(rng.choices(alphabet, k=length)) for _ in range(n)]
+    print(f"{'map':<22}{'resize s':>10}{'hash calls':>12}{'miss us':>10}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        function, calls = _counted(hash_function_2)
+        m = module.HashMap(11, function)
+        for key in keys:
+            m.put(key, key)
+
+        calls[0] = 0
+        start = time.perf_counter()
+        m.resize_table(m.get_capacity() * 2)
+        elapsed = time.perf_counter() - start
+        resize_calls = calls[0]
+
+        start = time.perf_counter()
+        for key in missing:
+            m.get(key)
+        miss = (time.perf_counter() - start) / n * 1e6
+        print(f"{name:<22}{elapsed:>10.4f}{resize_calls:>12}{miss:>10.2f}")
+
+
+def _key_shapes(n: int) -> dict:
+    """
+    Return lists of n keys in the shapes our maps commonly hold.
+    """
+    rng = random.Random(261)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    anagrams = itertools.permutations('abcdefgh')
+    return {
+        'sequential': ['str' + str(i) for i in range(n)],
+        'numeric': [str(i * 7919) for i in range(n)],
+        'anagram': [''.join(next(anagrams)) for _ in range(n)],
+        'long': [''.join(rng.choices(alphabet, k=64)) for _ in range(n)],
+    }
+
+
+def _probe_summary(m, keys: list) -> str:
+    """
+    Return mean, p99 and max probe length over keys as a fixed width
+    string.
+    """
+    lengths = [m.probe_length(key) for key in keys]
+    return (f"{sum(lengths) / len(lengths):>8.2f}"
+            f"{_percentile(lengths, 0.99):>6}{max(lengths):>7}")
+
+
+def bench_hash_functions(n: int = 2000) -> None:
+    """
+    Report hashing throughput of each hash function on each key shape, and
+    the probe lengths of open addressing and chain walks of separate
+    chaining maps holding n such keys.
+    """
+    functions = (('hash_function_1', hash_function_1),
+                 ('hash_function_2', hash_function_2),
+                 ('fnv1a', hash_function_fnv1a),
+                 ('builtin', hash_function_builtin),
+                 ('keyed', KeyedHashFunction()))
+    print(f"{'shape':<12}{'function':<17}{'Mhash/s':>8}"
+          f"{'oa mean':>9}{'p99':>6}{'max':>7}"
+          f"{'sc mean':>9}{'p99':>6}{'max':>7}")
+    for shape, keys in _key_shapes(n).items():
+        for name, function in functions:
+            start = time.perf_counter()
+            for key in keys:
+                function(key)
+            rate = n / (time.perf_counter() - start) / 1e6
+
+            oa = hash_map_oa.HashMap(11, function)
+            sc = hash_map_sc.HashMap(11, function)
+            for key in keys:
+                oa.put(key, key)
+                sc.put(key, key)
+            print(f"{shape:<12}{name:<17}{rate:>8.2f} "
+                  f"{_probe_summary(oa, keys)} {_probe_summary(sc, keys)}")
+
+
+def _timed(function, *args) -> float:
+    """
+    Call function with args and return the elapsed seconds.
+    """
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def bench_batch(n: int = 200000) -> None:
+    """
+    Compare put_many, get_many and remove_many against per-key loops over
+    a batch of n pairs loaded into an empty map.
+    """
+    pairs = [('key' + str(i), i) for i in range(n)]
+    keys = [key for key, _ in pairs]
+
+    def put_loop(m):
+        for key, value in pairs:
+            m.put(key, value)
+
+    def get_loop(m):
+        for key in keys:
+            m.get(key)
+
+    def remove_loop(m):
+        for key in keys:
+            m.remove(key)
+
+    print(f"{'map':<8}{'op':<10}{'loop s':>10}{'batch s':>10}{'speedup':>10}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        loop_map = module.HashMap(11, hash_function_builtin)
+        batch_map = module.HashMap(11, hash_function_builtin)
+        for op, loop, batch, arg in (
+                ('put', put_loop, batch_map.put_many, pairs),
+                ('get', get_loop, batch_map.get_many, keys),
+                ('remove', remove_loop, batch_map.remove_many, keys)):
+            loop_time = _timed(loop, loop_map)
+            batch_time = _timed(batch, arg)
+            print(f"{name:<8}{op:<10}{loop_time:>10.3f}{batch_time:>10.3f}"
+                  f"{loop_time / batch_time:>10.2f}")
+
+
+def bench_primes(n: int = 20000) -> None:
+    """
+    Report how fast capacities are picked for small and large tables, and
+    how many small maps of each kind can be created per second.
+    """
+    rng = random.Random(261)
+    small = [rng.randrange(1, 1000) for _ in range(n)]
+    large = [rng.randrange(1 << 18, 1 << 24) for _ in range(n)]
+    # The sizes maps created at the usual capacities ask for as they
+    # double past the sieve.
+    requests = []
+    for capacity in (11, 53, 101, 1000):
+        capacity = next_prime(capacity)
+        while capacity < 1 << 24:
+            if 2 * capacity >= 1 << 17:
+                requests.append(2 * capacity)
+            capacity = growth_prime(2 * capacity)
+    grown = [rng.choice(requests) for _ in range(n)]
+    for name, function, numbers in (
+            ('next_prime small', next_prime, small),
+            ('next_prime large', next_prime, large),
+            ('next_prime grown', next_prime, grown),
+            ('growth_prime grown', growth_prime, grown)):
+        elapsed = _timed(lambda: [function(x) for x in numbers])
+        print(f"{name:<22}{n / elapsed:>14,.0f} /s")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        elapsed = _timed(
+            lambda: [module.HashMap(x, hash_function_1) for x in small])
+        print(f"{name + ' maps':<22}{n / elapsed:>14,.0f} /s")
+
+
+def _mean_get_us(m, keys: list) -> float:
+    """
+    Return the mean latency of m.get over keys in microseconds.
+    """
+    return _timed(lambda: [m.get(key) for key in keys]) / len(keys) * 1e6
+
+
+def bench_tombstone_churn(cycles: int = 10000000, window: int = 10000,
+                          reports: int = 10) -> None:
+    """
+    Insert a new key and delete the oldest one for the given number of
+    cycles, keeping window keys live, and report get latency for live and
+    missing keys as the churn goes on. Without compaction the tombstones
+    pile up, so that run is capped at 50,000 cycles.
+    """
+    rng = random.Random(261)
+    print(f"{'tombstone_ratio':<17}{'cycles':>12}{'capacity':>10}"
+          f"{'hit us':>9}{'miss us':>9}")
+    for ratio in (0.25, None):
+        m = hash_map_oa.HashMap(11, hash_function_builtin,
+                                tombstone_ratio=ratio)
+        total = cycles if ratio is not None else min(cycles, 50000)
+        step = max(total // reports, 1)
+        for i in range(window):
+            m.put('key' + str(i), i)
+        for i in range(window, window + total):
+            m.put('key' + str(i), i)
+            m.remove('key' + str(i - window))
+            if (i - window + 1) % step == 0:
+                hits = ['key' + str(rng.randrange(i - window + 1, i + 1))
+                        for _ in range(200)]
+                misses = ['miss' + str(rng.randrange(1 << 30))
+                          for _ in range(200)]
+                print(f"{str(ratio):<17}{i - window + 1:>12,}"
+                      f"{m.get_capacity():>10}"
+                      f"{_mean_get_us(m, hits):>9.2f}"
+                      f"{_mean_get_us(m, misses):>9.2f}")
+
+
+def bench_shrink(n: int = 200000, keep: int = 2000) -> None:
+    """
+    Fill a map with n keys, remove all but keep of them, then time the
+    operations that walk every bucket, with and without shrinking.
+    """
+    keys = ['key' + str(i) for i in range(n)]
+    print(f"{'map':<14}{'shrink':>8}{'capacity':>10}{'remove s':>10}"
+          f"{'kv ms':>8}{'empty ms':>10}{'clear ms':>10}")
+    for name, module, shrink_load in (('sc', hash_map_sc, None),
+                                      ('sc', hash_map_sc, 0.25),
+                                      ('oa', hash_map_oa, None),
+                                      ('oa', hash_map_oa, 0.1)):
+        m = module.HashMap(11, hash_function_builtin,
+                           shrink_load=shrink_load)
+        m.put_many((key, key) for key in keys)
+        remove_time = _timed(m.remove_many, keys[keep:])
+        kv = _timed(m.get_keys_and_values) * 1e3
+        empty = _timed(m.empty_buckets) * 1e3
+        capacity = m.get_capacity()
+        clear = _timed(m.clear) * 1e3
+        print(f"{name:<14}{str(shrink_load):>8}{capacity:>10}"
+              f"{remove_time:>10.3f}{kv:>8.2f}{empty:>10.2f}{clear:>10.2f}")
+
+
+def bench_probing(capacity: int = 20011, queries: int = 20000) -> None:
+    """
+    Fill open addressing maps of a fixed capacity to load factors from 0.3
+    to 0.9 with each probing strategy, and report mean and max probe
+    lengths of hits and misses with get throughput. Keys go in through
+    _put_hashed, which skips the load check that would resize the table.
+    Quadratic probing only reaches half the buckets of a key, so it may
+    find no free bucket at high loads.
+    """
+    rng = random.Random(261)
+    misses = ['miss' + str(rng.randrange(1 << 30)) for _ in range(queries)]
+    print(f"{'probing':<12}{'load':>6}{'hit mean':>10}{'max':>6}"
+          f"{'miss mean':>11}{'max':>6}{'get Mops/s':>12}")
+    for probing in hash_map_oa.PROBING:
+        for load in (0.3, 0.5, 0.7, 0.8, 0.9):
+            m = hash_map_oa.HashMap(capacity, hash_function_builtin,
+                                    probing=probing)
+            keys = ['key' + str(i) for i in range(int(load * capacity))]
+            try:
+                for key in keys:
+                    m._put_hashed(key, key, hash_function_builtin(key))
+            except hash_map_oa.DynamicArrayException:
+                print(f"{probing:<12}{load:>6.1f}  no free bucket")
+                continue
+            sample = [rng.choice(keys) for _ in range(queries)]
+            hits = [m.probe_length(key) for key in sample]
+            missed = [m.probe_length(key) for key in misses]
+            elapsed = _timed(lambda: [m.get(key) for key in sample + misses])
+            print(f"{probing:<12}{load:>6.1f}"
+                  f"{sum(hits) / queries:>10.2f}{max(hits):>6}"
+                  f"{sum(missed) / queries:>11.2f}{max(missed):>6}"
+                  f"{2 * queries / elapsed / 1e6:>12.2f}")
+
+
+def bench_load_factor(n: int = 100000, queries: int = 20000) -> None:
+    """
+    Fill maps with n keys over a grid of max_load settings, up to 0.9 for
+    open addressing, and report the memory each table holds against its
+    put time and get latency for hits and misses. Each map starts at the
+    capacity where n keys bring it to max_load, so the grid isn't blurred
+    by where the growth steps happen to land.
+    """
+    rng = random.Random(261)
+    keys = ['key' + str(i) for i in range(n)]
+    hits = [rng.choice(keys) for _ in range(queries)]
+    misses = ['miss' + str(rng.randrange(1 << 30)) for _ in range(queries)]
+    grid = [('oa', 'quadratic', load) for load in (0.3, 0.4, 0.5)]
+    grid += [('oa', probing, load)
+             for probing in ('linear', 'double', 'robin_hood')
+             for load in (0.5, 0.7, 0.8, 0.9)]
+    grid += [('sc', None, load) for load in (0.5, 1.0, 2.0, 4.0)]
+    print(f"{'map':<6}{'probing':<12}{'max_load':>9}{'load':>6}"
+          f"{'MB':>8}{'put s':>8}{'hit us':>8}{'miss us':>9}")
+    for name, probing, load in grid:
+        capacity = hash_map_oa.HashMap._capacity_for(n, load)
+        if name == 'oa':
+            def factory():
+                return hash_map_oa.HashMap(capacity, hash_function_builtin,
+                                           probing=probing, max_load=load)
+        else:
+            def factory():
+                return hash_map_sc.HashMap(capacity, hash_function_builtin,
+                                           max_load=load)
+
+        def fill():
+            fresh = factory()
+            for key in keys:
+                fresh.put(key, key)
+
+        # Time the puts apart from the traced fill, which slows them down.
+        m, size = _map_bytes(factory, keys)
+        put_time = _timed(fill)
+        print(f"{name:<6}{str(probing):<12}{load:>9.1f}"
+              f"{m.table_load():>6.2f}{size / 2 ** 20:>8.1f}"
+              f"{put_time:>8.3f}{_mean_get_us(m, hits):>8.2f}"
+              f"{_mean_get_us(m, misses):>9.2f}")
+
+
+def bench_treeify(n: int = 5000, queries: int = 5000) -> None:
+    """
+    Load n anagrams of one word, which hash_function_1 sends to a single
+    bucket, into separate chaining maps with and without tree-ified
+    chains, and time puts, hits, misses and removes against it.
+    """
+    rng = random.Random(261)
+    keys = [''.join(p) for p in
+            itertools.islice(itertools.permutations('abcdefgh'), n)]
+    hits = [rng.choice(keys) for _ in range(queries)]
+    # Anagrams beyond the first n share the bucket but are not in the map.
+    misses = [''.join(p) for p in itertools.islice(
+        itertools.permutations('hgfedcba'), queries)]
+    print(f"{'treeify':<10}{'put s':>8}{'hit us':>9}{'miss us':>9}"
+          f"{'probes':>9}{'remove s':>10}")
+    for treeify in (False, True):
+        m = hash_map_sc.HashMap(11, hash_function_1, treeify=treeify)
+        put_time = _timed(lambda: [m.put(key, key) for key in keys])
+        probes = sum(m.probe_length(key) for key in hits) / queries
+        hit = _mean_get_us(m, hits)
+        miss = _mean_get_us(m, misses)
+        remove_time = _timed(lambda: [m.remove(key) for key in keys])
+        print(f"{str(treeify):<10}{put_time:>8.3f}{hit:>9.2f}{miss:>9.2f}"
+              f"{probes:>9.1f}{remove_time:>10.3f}")
+
+
+def bench_move_to_front(n: int = 20000, queries: int = 200000,
+                        skew: float = 1.1) -> None:
+    """
+    Look up keys drawn from a Zipf distribution over n keys in separate
+    chaining maps with long chains, with and without move-to-front, and
+    report the mean comparisons per lookup and get throughput.
+    """
+    rng = random.Random(261)
+    keys = ['key' + str(i) for i in range(n)]
+    ranked = keys[:]
+    rng.shuffle(ranked)
+    weights = [1 / rank ** skew for rank in range(1, n + 1)]
+    stream = rng.choices(ranked, weights, k=queries)
+    print(f"{'max_load':>9}{'move_to_front':>15}{'comparisons':>13}"
+          f"{'get Mops/s':>12}")
+    for max_load in (1.0, 4.0, 16.0):
+        for move_to_front in (False, True):
+            capacity = hash_map_sc.HashMap._capacity_for(n, max_load)
+            m = hash_map_sc.HashMap(capacity, hash_function_builtin,
+                                    max_load=max_load,
+                                    move_to_front=move_to_front)
+            for key in keys:
+                m.put(key, key)
+            comparisons = 0
+            for key in stream:
+                comparisons += m.probe_length(key)
+                m.get(key)
+            elapsed = _timed(lambda: [m.get(key) for key in stream])
+            print(f"{max_load:>9.1f}{str(move_to_front):>15}"
+                  f"{comparisons / queries:>13.2f}"
+                  f"{queries / elapsed / 1e6:>12.2f}")
+
+
+def bench_ops(n: int = 100000, rounds: int = 5) -> None:
+    """
+    Report the best of several rounds of ops/sec for the get, put and
+    remove hot paths of both maps at n keys. If the HASH_MAP_BENCH_HISTORY
+    environment variable names a CSV file, each result is also appended to
+    it with a timestamp, so throughput can be tracked across changes.
+    """
+    rng = random.Random(261)
+    keys = ['key' + str(i) for i in range(n)]
+    missing = ['miss' + str(i) for i in range(n)]
+    shuffled = keys[:]
+    rng.shuffle(shuffled)
+
+    def put_new(m):
+        for key in keys:
+            m.put(key, key)
+
+    def put_update(m):
+        for key in shuffled:
+            m.put(key, 0)
+
+    def get_hit(m):
+        for key in shuffled:
+            m.get(key)
+
+    def get_miss(m):
+        for key in missing:
+            m.get(key)
+
+    def remove_miss(m):
+        for key in missing:
+            m.remove(key)
+
+    def remove_hit(m):
+        for key in shuffled:
+            m.remove(key)
+
+    ops = (('put new', put_new), ('put update', put_update),
+           ('get hit', get_hit), ('get miss', get_miss),
+           ('remove miss', remove_miss), ('remove hit', remove_hit))
+    stamp = datetime.datetime.now().isoformat(timespec='seconds')
+    rows = []
+    print(f"{'map':<6}{'op':<14}{'Mops/s':>8}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        best = {op: 0.0 for op, _ in ops}
+        for _ in range(rounds):
+            m = module.HashMap(11, hash_function_builtin)
+            # Each op leaves the map as the next one expects it.
+            for op, function in ops:
+                best[op] = max(best[op], n / _timed(function, m) / 1e6)
+        for op, _ in ops:
+            print(f"{name:<6}{op:<14}{best[op]:>8.3f}")
+            rows.append((stamp, name, op, n, f"{best[op]:.4f}"))
+
+    history = os.environ.get('HASH_MAP_BENCH_HISTORY')
+    if history:
+        with open(history, 'a', newline='') as file:
+            csv.writer(file).writerows(rows)
+
+
+def bench_array_access(n: int = 1000000) -> None:
+    """
+    Compare the bounds-checked and unchecked DynamicArray accessors, and
+    building an array of n empty slots by appending against filled, then
+    time the map hot paths that now use them.
+    """
+    da = DynamicArray.filled(n)
+    indices = range(n)
+
+    def checked_get():
+        get = da.get_at_index
+        for i in indices:
+            get(i)
+
+    def unchecked_get():
+        get = da.get_unchecked
+        for i in indices:
+            get(i)
+
+    def checked_set():
+        put = da.set_at_index
+        for i in indices:
+            put(i, i)
+
+    def unchecked_set():
+        put = da.set_unchecked
+        for i in indices:
+            put(i, i)
+
+    def append_loop():
+        array = DynamicArray()
+        for _ in indices:
+            array.append(None)
+
+    print(f"{'operation':<22}{'ns/element':>12}")
+    for name, function in (('get_at_index', checked_get),
+                           ('get_unchecked', unchecked_get),
+                           ('set_at_index', checked_set),
+                           ('set_unchecked', unchecked_set),
+                           ('append loop', append_loop),
+                           ('filled', lambda: DynamicArray.filled(n))):
+        print(f"{name:<22}{_timed(function) / n * 1e9:>12.1f}")
+
+    keys = ['key' + str(i) for i in range(n // 10)]
+    print(f"\n{'map':<8}{'fill s':>8}{'get s':>8}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        m = module.HashMap(11, hash_function_builtin)
+        fill = _timed(lambda: [m.put(key, key) for key in keys])
+        get = _timed(lambda: [m.get(key) for key in keys])
+        print(f"{name:<8}{fill:>8.3f}{get:>8.3f}")
+
+
+def bench_clear(batch: int = 1000, cycles: int = 200) -> None:
+    """
+    Fill maps of growing capacity with a batch of keys and clear them, over
+    and over, and report the mean time of clear and of a whole cycle. With
+    generation stamping, clear costs the same at every capacity.
+    """
+    keys = ['key' + str(i) for i in range(batch)]
+    print(f"{'map':<6}{'capacity':>10}{'clear us':>10}{'cycle ms':>10}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        for capacity in (10 ** 4, 10 ** 5, 10 ** 6):
+            m = module.HashMap(capacity, hash_function_builtin)
+            clear_time = 0.0
+            start = time.perf_counter()
+            for _ in range(cycles):
+                for key in keys:
+                    m.put(key, key)
+                clear_time += _timed(m.clear)
+            cycle = (time.perf_counter() - start) / cycles
+            print(f"{name:<6}{m.get_capacity():>10}"
+                  f"{clear_time / cycles * 1e6:>10.2f}{cycle * 1e3:>10.2f}")
+
+
+def bench_stats(batch: int = 1000, calls: int = 1000) -> None:
+    """
+    Time stats() on maps of growing capacity holding a batch of keys, the
+    way a monitor polls them, and on incremental maps part-way through a
+    resize to twice that capacity. The counters keep the cost flat however
+    large the table is.
+    """
+    keys = ['key' + str(i) for i in range(batch)]
+    print(f"{'map':<13}{'capacity':>10}{'empty':>10}{'stats us':>10}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa),
+                         ('compact', hash_map_compact)):
+        for migrating in (False, True):
+            if migrating and not hasattr(module.HashMap, 'start_resize'):
+                continue
+            for capacity in (10 ** 4, 10 ** 5, 10 ** 6):
+                if migrating:
+                    m = module.HashMap(capacity, hash_function_builtin,
+                                       incremental=True)
+                else:
+                    m = module.HashMap(capacity, hash_function_builtin)
+                for key in keys:
+                    m.put(key, key)
+                if migrating:
+                    m.start_resize(capacity * 2)
+                    m.migrate_buckets(capacity // 2)
+                start = time.perf_counter()
+                for _ in range(calls):
+                    stats = m.stats()
+                elapsed = time.perf_counter() - start
+                label = name + (' migrating' if migrating else '')
+                print(f"{label:<13}{stats['capacity']:>10}"
+                      f"{stats['empty_buckets']:>10}"
+                      f"{elapsed / calls * 1e6:>10.2f}")
+
+
+def _find_mode_baseline(da: DynamicArray, function) -> tuple:
+    """
+    The original find_mode: copy the array, count with contains_key, get
+    and put, then look every value up again to find the mode.
+    """
+    map = hash_map_sc.HashMap(function=function)
+    mode = DynamicArray()
+    freq = 1
+    temp = DynamicArray()
+    for i in range(da.length()):
+        temp.append(da.get_at_index(i))
+    for i in range(temp.length()):
+        val = temp.get_at_index(i)
+        if map.contains_key(val):
+            map.put(val, map.get(val) + 1)
+            temp.set_at_index(i, None)
+        else:
+            map.put(val, 1)
+    for i in range(temp.length()):
+        val = temp.get_at_index(i)
+        if val is not None:
+            count = map.get(val)
+            if count > freq:
+                freq = map.get(val)
+                mode = DynamicArray()
+                mode.append(val)
+            elif count == freq:
+                mode.append(val)
+    return mode, freq
+
+
+def bench_find_mode(n: int = 200000, distinct: int = 10000) -> None:
+    """
+    Time the original find_mode against the single-hash HashMap path and,
+    when NumPy is installed, the NumPy path, on n strings and n integers
+    drawn from distinct values.
+    """
+    rng = random.Random(0)
+    numbers = [rng.randrange(distinct) for _ in range(n)]
+    cases = (('strings', DynamicArray(['v' + str(x) for x in numbers]),
+              hash_function_1),
+             ('integers', DynamicArray(numbers), hash_function_builtin))
+
+    numpy = hash_map_sc.numpy
+    print(f"{'input':<10}{'path':<10}{'s':>8}{'speedup':>9}")
+    for name, da, function in cases:
+        baseline = _timed(_find_mode_baseline, da, function)
+        print(f"{name:<10}{'baseline':<10}{baseline:>8.3f}{1:>9.2f}")
+        # Hide NumPy so find_mode takes the HashMap path.
+        hash_map_sc.numpy = None
+        try:
+            elapsed = _timed(hash_map_sc.find_mode, da, function)
+        finally:
+            hash_map_sc.numpy = numpy
+        print(f"{name:<10}{'hashmap':<10}{elapsed:>8.3f}"
+              f"{baseline / elapsed:>9.2f}")
+        if numpy is not None and name == 'integers':
+            elapsed = _timed(hash_map_sc.find_mode, da, function)
+            print(f"{name:<10}{'numpy':<10}{elapsed:>8.3f}"
+                  f"{baseline / elapsed:>9.2f}")
+
+
+def bench_stream(n: int = 500000, distinct: int = 100000, k: int = 20) -> None:
+    """
+    Count a Zipf-like stream of n values drawn from distinct ones with each
+    streaming counter, and report its throughput and how many of the true
+    top k it finds. ExactCounter runs both in memory and spilling to disk.
+    """
+    rng = random.Random(0)
+    stream = ['v' + str(int(rng.paretovariate(1.1)) % distinct)
+              for _ in range(n)]
+    counts = {}
+    for value in stream:
+        counts[value] = counts.get(value, 0) + 1
+    truth = set(sorted(counts, key=counts.get, reverse=True)[:k])
+
+    start = time.perf_counter()
+    hash_map_sc.find_mode(DynamicArray(stream), hash_function_builtin)
+    print(f"{'counter':<22}{'items/s':>12}{'top-k found':>13}")
+    print(f"{'find_mode':<22}{n / (time.perf_counter() - start):>12.0f}"
+          f"{'-':>13}")
+    counters = (
+        ('exact in memory', hash_map_stream.ExactCounter()),
+        ('exact spilling', hash_map_stream.ExactCounter(max_keys=distinct // 10)),
+        ('space saving', hash_map_stream.SpaceSaving(k=10 * k)),
+        ('count-min', hash_map_stream.CountMinSketch(k=k)))
+    for name, counter in counters:
+        counter.update(stream)
+        found = len(truth & {pair[0] for pair in counter.top(k)})
+        print(f"{name:<22}{counter.throughput():>12.0f}{found:>10}/{k}")
+        if isinstance(counter, hash_map_stream.ExactCounter):
+            counter.close()
+
+
+def bench_sharded(n: int = 200000) -> None:
+    """
+    Load n pairs with put_many and look them all up with get_many, in one
+    HashMap and in ShardedHashMaps of 1 up to one shard per CPU, doubling,
+    and report the times and speedup over the single map. The pure
+    Python hash_function_2 keeps each shard busy enough for the work to
+    outweigh sending the keys over.
+    """
+    pairs = [('key' + str(i), i) for i in range(n)]
+    keys = [key for key, _ in pairs]
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+
+    print(f"{'map':<6}{'type':<6}{'shards':>7}{'put s':>8}{'get s':>8}"
+          f"{'merge s':>9}{'speedup':>9}")
+    for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        single = module.HashMap(11, hash_function_2)
+        put = _timed(single.put_many, pairs)
+        get = _timed(single.get_many, keys)
+        baseline = put + get
+        print(f"{name:<6}{'plain':<6}{'-':>7}{put:>8.2f}{get:>8.2f}"
+              f"{'-':>9}{1:>9.2f}")
+        for shards in counts:
+            with hash_map_sharded.ShardedHashMap(
+                    shards, module.HashMap, 11, hash_function_2) as m:
+                put = _timed(m.put_many, pairs)
+                get = _timed(m.get_many, keys)
+                merge = _timed(m.merge)
+            print(f"{name:<6}{'shard':<6}{shards:>7}{put:>8.2f}{get:>8.2f}"
+                  f"{merge:>9.2f}{baseline / (put + get):>9.2f}")
+
+
+class _LockedHashMap:
+    """
+    A separate chaining HashMap behind one global lock, the way maps are
+    shared between threads without ConcurrentHashMap.
+    """
+
+    def __init__(self, function) -> None:
+        """Initialize an empty map that hashes keys with function."""
+        self._map = hash_map_sc.HashMap(11, function)
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: object) -> None:
+        """Put the key/value pair while holding the lock."""
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        """Return the value of key while holding the lock."""
+        with self._lock:
+            return self._map.get(key)
+
+    def remove(self, key: str) -> None:
+        """Remove key while holding the lock."""
+        with self._lock:
+            self._map.remove(key)
+
+
+def bench_concurrent(ops: int = 400000, keys: int = 50000,
+                     reads: float = 0.9) -> None:
+    """
+    Run ops operations, a reads share of them gets and the rest split
+    between puts and removes, spread over 1 to 8 threads, against a
+    globally locked HashMap and a ConcurrentHashMap, and report operations
+    per second. Threads only run in parallel on a free-threaded build.
+    """
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"GIL {'enabled' if gil else 'disabled'}")
+    rng = random.Random(0)
+    names = ['key' + str(i) for i in range(keys)]
+    plan = [(rng.random(), rng.choice(names)) for _ in range(ops)]
+
+    def work(m, share: list) -> None:
+        for draw, key in share:
+            if draw < reads:
+                m.get(key)
+            elif draw < (1 + reads) / 2:
+                m.put(key, draw)
+            else:
+                m.remove(key)
+
+    print(f"{'map':<12}{'threads':>8}{'Mops/s':>8}")
+    for name, factory in (
+            ('locked', lambda: _LockedHashMap(hash_function_builtin)),
+            ('concurrent', lambda: hash_map_concurrent.ConcurrentHashMap(
+                11, hash_function_builtin))):
+        for count in (1, 2, 4, 8):
+            m = factory()
+            work(m, [(0.0, key) for key in names[::2]])
+            threads = [threading.Thread(target=work,
+                                        args=(m, plan[i::count]))
+                       for i in range(count)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<12}{count:>8}{ops / elapsed / 1e6:>8.3f}")
+
+
+async def _loop_lag(operation, interval: float = 0.001) -> tuple:
+    """
+    Await operation while a ticker task sleeps interval seconds at a time,
+    and return the operation's seconds and the ticker's worst and 99th
+    percentile lateness in milliseconds: how long the loop was held up.
+    The garbage collector is paused so its passes don't show up as
+    stalls.
+    """
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = False
+
+    async def ticker() -> None:
+        while not done:
+            due = loop.time() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(loop.time() - due, 0.0))
+
+    gc.collect()
+    gc.disable()
+    try:
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await operation()
+        elapsed = time.perf_counter() - start
+        done = True
+        await task
+    finally:
+        gc.enable()
+    return elapsed, max(lags) * 1e3, _percentile(lags, 0.99) * 1e3
+
+
+def bench_loop_lag(n: int = 200000, step: int = 1000) -> None:
+    """
+    Resize a map of n entries to twice its capacity and list its entries,
+    once with the plain blocking calls and once through AsyncHashMap
+    yielding every step buckets or entries, and report how long a 1 ms
+    ticker task on the same event loop was held up.
+    """
+    pairs = [('key' + str(i), i) for i in range(n)]
+    print(f"{'map':<4}{'operation':<21}{'way':<7}{'s':>7}{'max ms':>9}"
+          f"{'p99 ms':>9}")
+
+    async def run() -> None:
+        for name, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+            plain = module.HashMap.from_pairs(pairs, hash_function_builtin)
+            facade = hash_map_async.AsyncHashMap(
+                module.HashMap, plain.get_capacity(), hash_function_builtin,
+                step=step)
+            await facade.put_many(pairs)
+
+            async def plain_resize():
+                plain.resize_table(plain.get_capacity() * 2)
+
+            async def plain_list():
+                plain.get_keys_and_values()
+
+            async def facade_resize():
+                await facade.resize(facade.get_capacity() * 2)
+
+            for operation, blocking, cooperative in (
+                    ('resize_table', plain_resize, facade_resize),
+                    ('get_keys_and_values', plain_list,
+                     facade.get_keys_and_values)):
+                for way, call in (('plain', blocking),
+                                  ('async', cooperative)):
+                    elapsed, worst, p99 = await _loop_lag(call)
+                    print(f"{name:<4}{operation:<21}{way:<7}{elapsed:>7.3f}"
+                          f"{worst:>9.2f}{p99:>9.2f}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or [name[len('bench_'):] for name in globals()
+                             if name.startswith('bench_')]
+    for name in names:
+        print(f"\n{name}")
+        print('-' * len(name))
+        globals()['bench_' + name]()
@@ -0,0 +1,391 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: This code implements a compact HashMap class with open
+#               addressing. It has the same methods as the HashMap in
+#               hash_map_oa, but instead of a HashEntry object per bucket it
+#               keeps hashes, keys, values and bucket states in parallel
+#               flat arrays.
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry, growth_prime,
+                        hash_function_1, hash_function_2, is_prime,
+                        next_prime)
+
+# Bucket states kept in the state bytearray.
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Stored hashes are masked to fit a signed 64-bit array slot.
+_HASH_MASK = (1 << 63) - 1
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+
+        # Bumped by every change that adds, removes or moves entries, so
+        # live iterators can detect it.
+        self._mod_count = 0
+
+        # Bucket the next call to __next__ starts from.
+        self._index = 0
+
+        # Tombstones in the state array.
+        self._tombstones = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._state[i] == EMPTY:
+                entry = None
+            else:
+                entry = HashEntry(self._keys[i], self._values[i],
+                                  self._hashes[i])
+                entry.is_tombstone = self._state[i] == TOMBSTONE
+            out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Find the closest prime number at or above the given number in the
+        precomputed prime tables
+        """
+        return next_prime(capacity)
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        return is_prime(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replace the storage arrays with capacity empty buckets.
+        """
+        self._hashes = array('q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._state = bytearray(capacity)
+
+    def _locate(self, key: str, hash: int) -> tuple[int, bool]:
+        """
+        Probe for key. Return the index of the live bucket holding key and
+        True, or the first free bucket of the probe sequence and False if
+        the key is not present.
+        """
+        capacity = self._capacity
+        state, hashes, keys = self._state, self._hashes, self._keys
+        index = hash % capacity
+        free = -1
+        for counter in range(capacity):
+            newIndex = index + counter ** 2
+            if newIndex >= capacity:
+                newIndex = newIndex % capacity
+            slot = state[newIndex]
+            if slot == EMPTY:
+                return (newIndex if free < 0 else free), False
+            if slot == TOMBSTONE:
+                if free < 0:
+                    free = newIndex
+            elif hashes[newIndex] == hash and keys[newIndex] == key:
+                return newIndex, True
+        return free, False
+
+    def _store(self, index: int, key: str, value: object, hash: int) -> None:
+        """
+        Fill the free bucket at index with a live entry.
+        """
+        if self._state[index] == TOMBSTONE:
+            self._tombstones -= 1
+        self._hashes[index] = hash
+        self._keys[index] = key
+        self._values[index] = value
+        self._state[index] = LIVE
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Update the key/value pair in the hash map. If key already exists,
+        the associated value is replaced with new value. If not, both key
+        and value is added.
+        """
+        # Check load factor.
+        if self.table_load() >= 0.5:
+            self.resize_table(growth_prime(self._capacity * 2))
+
+        # Update value or add key and value.
+        hash = self._hash_function(key) & _HASH_MASK
+        index, found = self._locate(key, hash)
+        if found:
+            self._values[index] = value
+        else:
+            self._store(index, key, value, hash)
+            self._size += 1
+            self._mod_count += 1
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of table if the new capacity is greater than
+        or equal to the current number of elements. If capacity is not a
+        prime number, change to next highest prime number.
+        """
+        # Check if new capacity is valid and change if needed.
+        capacity = new_capacity
+        if capacity < self._size:
+            return
+        if not self._is_prime(capacity):
+            capacity = self._next_prime(capacity)
+
+        # Keep doubling while the entries would still overload the table.
+        while self._size > 0 and (self._size - 1) / capacity >= 0.5:
+            capacity = growth_prime(capacity * 2)
+
+        # Change the table capacity.
+        hashes, keys, values = self._hashes, self._keys, self._values
+        state = self._state
+        self._allocate(capacity)
+        self._capacity = capacity
+        self._tombstones = 0
+        self._mod_count += 1
+
+        # Reassign entries using their stored hashes.
+        for i in range(len(state)):
+            if state[i] == LIVE:
+                index, _ = self._locate(keys[i], hashes[i])
+                self._store(index, keys[i], values[i], hashes[i])
+
+    def table_load(self) -> float:
+        """
+        Return the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Return the number of empty buckets, tombstones included.
+        """
+        return self._capacity - self._size
+
+    def stats(self) -> dict:
+        """
+        Return the size, capacity, empty buckets, tombstones and load factor
+        of the hash map, without scanning the table. Tombstones are
+        included in the empty buckets.
+        """
+        return {'size': self._size,
+                'capacity': self._capacity,
+                'empty_buckets': self.empty_buckets(),
+                'tombstones': self._tombstones,
+                'table_load': self.table_load()}
+
+    def get(self, key: str) -> object:
+        """
+        Return the value associated with the given key. Return None if key
+        is not in has map.
+        """
+        index, found = self._locate(key, self._hash_function(key) & _HASH_MASK)
+        return self._values[index] if found else None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Return True if key is in hash map and False otherwise.
+        """
+        return self.get(key) is not None
+
+    def probe_length(self, key: str) -> int:
+        """
+        Return the number of buckets examined to look up key, whether or
+        not it is found.
+        """
+        hash = self._hash_function(key) & _HASH_MASK
+        index = hash % self._capacity
+        for counter in range(self._capacity):
+            newIndex = index + counter ** 2
+            if newIndex >= self._capacity:
+                newIndex = newIndex % self._capacity
+            slot = self._state[newIndex]
+            if slot == EMPTY or (slot == LIVE and
+                                 self._hashes[newIndex] == hash and
+                                 self._keys[newIndex] == key):
+                return counter + 1
+        return self._capacity
+
+    def remove(self, key: str) -> None:
+        """
+        Remove key and value from hash map. If not found, do nothing.
+        """
+        index, found = self._locate(key, self._hash_function(key) & _HASH_MASK)
+        if found:
+            # Drop the key and value so the removed objects can be freed.
+            self._state[index] = TOMBSTONE
+            self._keys[index] = None
+            self._values[index] = None
+            self._tombstones += 1
+            self._size -= 1
+            self._mod_count += 1
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array with tuples of key/value pairs stored
+        in the has map.
+        """
+        da = DynamicArray()
+        state, keys, values = self._state, self._keys, self._values
+        for i in range(self._capacity):
+            if state[i] == LIVE:
+                da.append((keys[i], values[i]))
+        return da
+
+    def clear(self) -> None:
+        """
+        Clear the contents of hash map.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+        self._mod_count += 1
+
+    def __iter__(self):
+        """
+        Enable the hash map to iterate across itself, yielding each item as
+        a HashEntry. Each call returns an independent iterator, so several
+        can run at once. It also restarts the iteration of __next__.
+        """
+        self._index = 0
+        return (HashEntry(self._keys[index], self._values[index],
+                          self._hashes[index])
+                for index in self._live())
+
+    def __next__(self):
+        """
+        Return the next item in a hash map based on location of iterator,
+        the one __next__ itself keeps and iter() restarts.
+        """
+        index = self._state.find(LIVE, self._index)
+        if index < 0:
+            self._index = self._capacity
+            raise StopIteration
+        self._index = index + 1
+        return HashEntry(self._keys[index], self._values[index],
+                         self._hashes[index])
+
+    def _live(self):
+        """
+        Yield the index of every live bucket. Raise RuntimeError if the map
+        is changed while the iteration is running.
+        """
+        mod_count = self._mod_count
+        state = self._state
+        # Skip buckets that are empty or hold a tombstone.
+        index = state.find(LIVE)
+        while index >= 0:
+            yield index
+            if self._mod_count != mod_count:
+                raise RuntimeError("HashMap changed during iteration")
+            index = state.find(LIVE, index + 1)
+
+    def keys(self):
+        """
+        Return an iterator over the keys in hash map.
+        """
+        keys = self._keys
+        return (keys[index] for index in self._live())
+
+    def values(self):
+        """
+        Return an iterator over the values in hash map.
+        """
+        values = self._values
+        return (values[index] for index in self._live())
+
+    def items(self):
+        """
+        Return an iterator over the (key, value) pairs in hash map.
+        """
+        keys, values = self._keys, self._values
+        return ((keys[index], values[index]) for index in self._live())
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - get_keys_and_values example 1")
+    print("------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+
+    m.resize_table(2)
+    print(m.get_keys_and_values())
+
+    m.put('20', '200')
+    m.remove('1')
+    m.resize_table(12)
+    print(m.get_keys_and_values())
+
+    print("\nPDF - __iter__(), __next__() example 2")
+    print("---------------------")
+    m = HashMap(10, hash_function_2)
+    for i in range(5):
+        m.put(str(i), str(i * 24))
+    m.remove('0')
+    m.remove('4')
+    print(m)
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
+
+    print("\nremove example 2")
+    print("----------------")
+    import weakref
+
+    class Value:
+        pass
+
+    # Removed values are freed at once, not kept by their tombstones.
+    m = HashMap(53, hash_function_1)
+    values = [Value() for _ in range(20)]
+    refs = [weakref.ref(value) for value in values]
+    for i, value in enumerate(values):
+        m.put('key' + str(i), value)
+    del values, value
+    for i in range(0, 20, 2):
+        m.remove('key' + str(i))
+    print(m.get_size(), sum(ref() is not None for ref in refs))
@@ -0,0 +1,370 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: This code implements a ConcurrentHashMap class with separate
+#               chaining that can be shared between threads. Writers lock
+#               only the stripe of buckets their key falls in, readers take
+#               no lock at all, and resizing builds a new table beside the
+#               old one, so reads carry on while it runs.
+
+import math
+import threading
+
+from a6_include import (DynamicArray, LinkedList, growth_prime,
+                        hash_function_1, hash_function_2, next_prime)
+
+
+class ConcurrentHashMap:
+    # Default load factor at which put grows the table, and how much it
+    # multiplies the capacity by.
+    MAX_LOAD = 1.0
+    GROWTH_FACTOR = 2
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 stripes: int = 16,
+                 max_load: float = MAX_LOAD,
+                 growth_factor: float = GROWTH_FACTOR) -> None:
+        """
+        Initialize new ConcurrentHashMap that uses separate chaining for
+        collision resolution. Bucket i is guarded by lock i % stripes, so
+        up to stripes writers can change the map at once; get, contains_key
+        and iteration take no lock.
+        Once the load reaches max_load, put multiplies the capacity by
+        growth_factor.
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        if max_load <= 0:
+            raise ValueError("max_load must be greater than 0")
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        self._hash_function = function
+        self._max_load = max_load
+        self._growth_factor = growth_factor
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+        # Nodes and non-empty buckets of each stripe, changed only under
+        # its lock.
+        self._counts = [0] * stripes
+        self._used = [0] * stripes
+
+        # The table is published as a single (capacity, buckets) tuple, so
+        # a reader always sees a capacity and buckets that belong together.
+        # Tables are never changed once replaced.
+        capacity = next_prime(capacity)
+        self._table = (capacity, self._new_buckets(capacity))
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        capacity, buckets = self._table
+        out = ''
+        for i in range(capacity):
+            out += str(i) + ': ' + str(buckets.get_unchecked(i)) + '\n'
+        return out
+
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
+        """
+        Return a dynamic array of capacity empty buckets.
+        """
+        return DynamicArray([LinkedList() for _ in range(capacity)])
+
+    def get_size(self) -> int:
+        """
+        Return size of map. While other threads are changing it, the size
+        may be off by the changes in progress.
+        """
+        return sum(self._counts)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._table[0]
+
+    # ------------------------------------------------------------------ #
+
+    def _grown(self, capacity: int) -> int:
+        """
+        Return the prime capacity that a table of the given capacity grows
+        to, following the growth table when the growth factor is 2.
+        """
+        number = math.ceil(capacity * self._growth_factor)
+        if self._growth_factor == 2:
+            return growth_prime(number)
+        return next_prime(number)
+
+    def _lock_bucket(self, hash: int) -> tuple:
+        """
+        Lock the stripe of the bucket a key with the given hash belongs in,
+        and return the stripe, the bucket and the table it is in. If a
+        resize replaces the table while waiting for the lock, try again on
+        the new one.
+        """
+        while True:
+            table = self._table
+            index = hash % table[0]
+            stripe = index % len(self._locks)
+            lock = self._locks[stripe]
+            lock.acquire()
+            if self._table is table:
+                return stripe, table[1].get_unchecked(index), table
+            lock.release()
+
+    def _lock_all(self) -> None:
+        """
+        Acquire every stripe lock, always in the same order, so no writer
+        can change the table.
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Release every stripe lock.
+        """
+        for lock in self._locks:
+            lock.release()
+
+    def _add(self, stripe: int, bucket: LinkedList, key: str,
+             value: object, hash: int, table: tuple) -> bool:
+        """
+        Add a node for a key that is not in the map to its locked bucket,
+        and return True if the stripe has grown past its share of the
+        maximum load.
+        """
+        if bucket.length() == 0:
+            self._used[stripe] += 1
+        bucket.insert(key, value, hash)
+        self._counts[stripe] += 1
+        return self._counts[stripe] * len(self._locks) >= \
+            self._max_load * table[0]
+
+    def _grow_if_loaded(self, table: tuple) -> None:
+        """
+        Grow the table if the map as a whole has reached the maximum load
+        and no other thread has resized it since table was current.
+        """
+        if self.get_size() >= self._max_load * table[0]:
+            self._resize(self._grown(table[0]), table)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Update the key/value pair in the hash map. If key already exists,
+        the associated value is replaced with new value. If not, both key
+        and value is added.
+        """
+        hash = self._hash_function(key)
+        stripe, bucket, table = self._lock_bucket(hash)
+        try:
+            node = bucket.contains(key, hash)
+            if node is not None:
+                node.value = value
+                return
+            crowded = self._add(stripe, bucket, key, value, hash, table)
+        finally:
+            self._locks[stripe].release()
+        if crowded:
+            self._grow_if_loaded(table)
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Return the value associated with the given key. If key is not in
+        hash map, add it with value default and return default. The check
+        and the add happen atomically.
+        """
+        hash = self._hash_function(key)
+        stripe, bucket, table = self._lock_bucket(hash)
+        try:
+            node = bucket.contains(key, hash)
+            if node is not None:
+                return node.value
+            crowded = self._add(stripe, bucket, key, default, hash, table)
+        finally:
+            self._locks[stripe].release()
+        if crowded:
+            self._grow_if_loaded(table)
+        return default
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of table if new capacity is 1 or more and a
+        prime number. If not a prime number, change to next highest prime
+        number. Writers wait while the new table is built; readers keep
+        using the old one until it is swapped in.
+        """
+        if new_capacity < 1:
+            return
+        self._resize(next_prime(new_capacity))
+
+    def _resize(self, capacity: int, expected: tuple = None) -> None:
+        """
+        Copy every node into a new table of capacity buckets and publish
+        it, unless expected is given and is no longer the current table.
+        """
+        self._lock_all()
+        try:
+            table = self._table
+            if expected is not None and table is not expected:
+                return
+
+            # Keep doubling while the entries would still overload the table.
+            size = self.get_size()
+            while size > 0 and (size - 1) / capacity >= self._max_load:
+                capacity = self._grown(capacity)
+
+            # Copy the nodes instead of relinking them, so readers still
+            # walking the old chains are not led astray.
+            stripes = len(self._locks)
+            counts = [0] * stripes
+            used = [0] * stripes
+            buckets = self._new_buckets(capacity)
+            for bucket in table[1]:
+                for node in bucket:
+                    index = node.hash % capacity
+                    chain = buckets.get_unchecked(index)
+                    if chain.length() == 0:
+                        used[index % stripes] += 1
+                    chain.insert(node.key, node.value, node.hash)
+                    counts[index % stripes] += 1
+            self._counts = counts
+            self._used = used
+            self._table = (capacity, buckets)
+        finally:
+            self._unlock_all()
+
+    def table_load(self) -> float:
+        """
+        Return the current hash table load factor.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Return the number of empty buckets.
+        """
+        return self.get_capacity() - sum(self._used)
+
+    def get(self, key: str) -> object:
+        """
+        Return the value associated with the given key. Return None if key
+        is not in hash map. Takes no lock.
+        """
+        hash = self._hash_function(key)
+        capacity, buckets = self._table
+        node = buckets.get_unchecked(hash % capacity).contains(key, hash)
+        if node is not None:
+            return node.value
+        return None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Return True if key is in hash map and False otherwise. Takes no
+        lock.
+        """
+        hash = self._hash_function(key)
+        capacity, buckets = self._table
+        return buckets.get_unchecked(hash % capacity).contains(key, hash) \
+            is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Remove key and value from hash map. If not found, do nothing.
+        """
+        hash = self._hash_function(key)
+        stripe, bucket, _ = self._lock_bucket(hash)
+        try:
+            if bucket.remove(key, hash):
+                self._counts[stripe] -= 1
+                if bucket.length() == 0:
+                    self._used[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array with tuples of key/value pairs stored in the
+        hash map.
+        """
+        return DynamicArray(list(self.items()))
+
+    def clear(self) -> None:
+        """
+        Clear the contents of hash map by publishing an empty table of the
+        same capacity.
+        """
+        self._lock_all()
+        try:
+            capacity = self._table[0]
+            self._counts = [0] * len(self._locks)
+            self._used = [0] * len(self._locks)
+            self._table = (capacity, self._new_buckets(capacity))
+        finally:
+            self._unlock_all()
+
+    def __iter__(self):
+        """
+        Enable the hash map to iterate across its nodes without locking.
+        Iteration is weakly consistent: it never fails because of other
+        threads, and sees some but not necessarily all of the changes
+        they make while it runs.
+        """
+        capacity, buckets = self._table
+        for bucket in buckets:
+            yield from bucket
+
+    def keys(self):
+        """
+        Return a weakly consistent iterator over the keys in hash map.
+        """
+        return (node.key for node in self)
+
+    def values(self):
+        """
+        Return a weakly consistent iterator over the values in hash map.
+        """
+        return (node.value for node in self)
+
+    def items(self):
+        """
+        Return a weakly consistent iterator over the (key, value) pairs in
+        hash map.
+        """
+        return ((node.key, node.value) for node in self)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = ConcurrentHashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nconcurrent put / get example 1")
+    print("------------------------------")
+    m = ConcurrentHashMap(11, hash_function_2, stripes=4)
+
+    def work(start: int) -> None:
+        for i in range(start, start + 2000):
+            m.put('key' + str(i), i)
+            m.get('key' + str(i - 1000))
+            if i % 3 == 0:
+                m.remove('key' + str(i))
+
+    threads = [threading.Thread(target=work, args=(start,))
+               for start in range(0, 8000, 2000)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(m.get_size(), m.get_capacity(),
+          all(m.get('key' + str(i)) == (None if i % 3 == 0 else i)
+              for i in range(8000)))
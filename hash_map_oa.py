@@ -8,69 +8,167 @@
 #               put, resize table, table load, empty buckets, get, contains
 #               key, remove, get keys and values, clear, iter, and next.
 
+import math
+
 from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+                        SlotDynamicArray, SlotHashEntry, growth_prime,
+                        hash_function_1, hash_function_2, is_prime,
+                        next_prime)
+
+
+# Shared placeholder left in the old table once its entry has been moved
+# to the new table during an incremental resize.
+_MIGRATED = HashEntry(None, None)
+_MIGRATED.is_tombstone = True
+
+# Multiplier and mask of the Fibonacci hashing that mixes a key's hash into
+# the step of double hashing.
+_FIBONACCI = 0x9e3779b97f4a7c15
+_MASK_64 = (1 << 64) - 1
+
+# Collision resolution strategies the HashMap can use.
+PROBING = ('linear', 'quadratic', 'double', 'robin_hood')
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    # Least number of old buckets moved into the new table by each put,
+    # get and remove while an incremental resize is in progress.
+    MIGRATION_STEP = 4
+
+    # clear() swaps in a fresh bucket array, so the old entries can be
+    # freed, when the table has at most this many buckets or is at least
+    # an eighth full.
+    FRESH_CLEAR_CAPACITY = 1 << 16
+
+    # Default load factor at which put grows the table, and how much it
+    # multiplies the capacity by.
+    MAX_LOAD = 0.5
+    GROWTH_FACTOR = 2
+
+    def __init__(self, capacity: int, function,
+                 incremental: bool = False, slots: bool = False,
+                 tombstone_ratio: float = 0.25,
+                 shrink_load: float = None,
+                 probing: str = 'quadratic',
+                 second_function=None,
+                 max_load: float = MAX_LOAD,
+                 growth_factor: float = GROWTH_FACTOR) -> None:
         """
-        Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Initialize new HashMap that uses open addressing with the given
+        probing for collision resolution, quadratic by default:
+        - 'linear' steps one bucket at a time.
+        - 'double' steps by a second hash of the key, taken from
+          second_function if given and from the key's hash otherwise.
+        - 'robin_hood' probes linearly, lets entries far from their home
+          bucket take the place of closer ones, and deletes by shifting
+          later entries back instead of leaving tombstones.
+        If incremental is True, growing the table keeps the old buckets
+        alongside the new ones and moves them over a few at a time.
+        If slots is True, the table is built from the __slots__ variants
+        of DynamicArray and HashEntry.
+        Once tombstones fill more than tombstone_ratio of the buckets, remove
+        compacts the table, a few buckets at a time if incremental is True;
+        None turns automatic compaction off.
+        Once the load drops below shrink_load, remove shrinks the table, but
+        never below its initial capacity; None leaves it at full size.
+        Once the load reaches max_load, put multiplies the capacity by
+        growth_factor. Quadratic probing reaches only half the buckets of
+        a key, so it allows a max_load of at most 0.5; the other schemes
+        allow anything below 1.
         """
-        self._buckets = DynamicArray()
+        if probing not in PROBING:
+            raise ValueError(f"probing must be one of {', '.join(PROBING)}")
+        if probing == 'quadratic' and not 0 < max_load <= 0.5:
+            raise ValueError("max_load must be between 0 and 0.5 with "
+                             "quadratic probing")
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be between 0 and 1")
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        if shrink_load is not None and not 0 < shrink_load < max_load / 2:
+            raise ValueError("shrink_load must be between 0 and half of "
+                             f"the {max_load} maximum load factor")
+
+        self._array_type = SlotDynamicArray if slots else DynamicArray
+        self._entry_type = SlotHashEntry if slots else HashEntry
 
         # capacity must be a prime number
         self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        self._buckets = self._array_type.filled(self._capacity)
 
         self._hash_function = function
+        self._probing = probing
+        self._second_function = second_function
+
+        # Pick the lookup loop for the probing once. _locate(buckets,
+        # capacity, key, hash) returns the index of the live entry with
+        # key and True, or the first free bucket of the probe sequence and
+        # False if the key is not present. Robin Hood tables return -1
+        # instead of a free bucket, as new entries need _insert to place
+        # them.
+        if probing == 'robin_hood':
+            self._locate = self._rh_find
+        elif probing == 'double':
+            self._locate = self._locate_double
+        else:
+            self._locate = self._locate_stepped
+        # Quadratic offsets 0, 1, 4, 9, ... are reached by steps 1, 3, 5, ...
+        self._step_growth = 2 if probing == 'quadratic' else 0
+
         self._size = 0
+        self._min_capacity = self._capacity
+        self._shrink_load = shrink_load
+        self._max_load = max_load
+        self._growth_factor = growth_factor
+
+        # Bumped by every change that adds, removes or moves entries, so
+        # live iterators can detect it.
+        self._mod_count = 0
+
+        # Bucket the next call to __next__ starts from.
+        self._index = 0
+
+        # Generation of the map. clear() starts a new one, and entries from
+        # older generations count as empty buckets.
+        self._epoch = 0
+
+        # Tombstones in the current table.
+        self._tombstones = 0
+        self._tombstone_ratio = tombstone_ratio
+
+        # Old table and migration cursor of an incremental resize.
+        self._incremental = incremental
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+        self._migration_step = self.MIGRATION_STEP
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
         out = ''
         for i in range(self._buckets.length()):
-            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+            entry = self._buckets[i]
+            # Entries added before the last clear() read as empty buckets.
+            if entry is not None and entry.epoch != self._epoch:
+                entry = None
+            out += str(i) + ': ' + str(entry) + '\n'
         return out
 
     def _next_prime(self, capacity: int) -> int:
         """
-        Increment from given number to find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Find the closest prime number at or above the given number in the
+        precomputed prime tables
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
-            return True
-
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-
-        return True
+        return is_prime(capacity)
 
     def get_size(self) -> int:
         """
@@ -88,37 +186,358 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
+    @classmethod
+    def from_pairs(cls, pairs, function, **options) -> "HashMap":
+        """
+        Return a new HashMap holding every (key, value) pair of a
+        DynamicArray or other iterable. The capacity is picked once for the
+        number of pairs, so the table is never resized while loading.
+        Other keyword options are passed to the constructor.
+        """
+        pairs = list(pairs)
+        total = max(len(pairs), 1)
+        max_load = options.get('max_load', cls.MAX_LOAD)
+        m = cls(cls._capacity_for(total, max_load), function, **options)
+        m.put_many(pairs)
+        return m
+
+    def _grown(self, capacity: int) -> int:
+        """
+        Return the prime capacity that a table of the given capacity grows
+        to, following the growth table when the growth factor is 2.
+        """
+        number = math.ceil(capacity * self._growth_factor)
+        if self._growth_factor == 2:
+            return growth_prime(number)
+        return self._next_prime(number)
+
+    @staticmethod
+    def _capacity_for(total: int, max_load: float) -> int:
+        """
+        Return the smallest capacity that holds total entries while the
+        load before the last of them is added stays below max_load.
+        """
+        return int((total - 1) / max_load) + 1
+
+    def _probe_start(self, key: str, hash: int,
+                     capacity: int) -> tuple[int, int, int]:
+        """
+        Return the first bucket of the probe sequence for a key, the step
+        to the next bucket and how much that step grows after each probe.
+        """
+        if self._probing == 'double':
+            return hash % capacity, self._double_step(key, hash, capacity), 0
+        return hash % capacity, 1, self._step_growth
+
+    def _double_step(self, key: str, hash: int, capacity: int) -> int:
+        """
+        Return the step of the double hashing probe sequence for a key.
+        """
+        if self._second_function is None:
+            # Take high bits of the mixed hash, so even small hashes get
+            # steps that don't depend on the capacity.
+            second = (hash * _FIBONACCI & _MASK_64) >> 32
+        else:
+            second = self._second_function(key)
+        return 1 + second % (capacity - 1)
+
+    def _locate_stepped(self, buckets: DynamicArray, capacity: int,
+                        key: str, hash: int) -> tuple[int, bool]:
+        """
+        Probe buckets for key linearly or quadratically. Return the index
+        of the live entry with that key and True, or the first free bucket
+        of the probe sequence and False if the key is not present.
+        """
+        index = hash % capacity
+        step = 1
+        grow = self._step_growth
+        epoch = self._epoch
+        free = -1
+        probes = capacity
+        entry = buckets.get_unchecked(index)
+        while entry is not None:
+            if entry.is_tombstone:
+                if free < 0:
+                    free = index
+            elif entry.epoch != epoch:
+                break
+            elif entry.hash == hash and entry.key == key:
+                return index, True
+            probes -= 1
+            if probes == 0:
+                return free, False
+            index += step
+            if index >= capacity:
+                index %= capacity
+            step += grow
+            entry = buckets.get_unchecked(index)
+        return (index if free < 0 else free), False
+
+    def _locate_double(self, buckets: DynamicArray, capacity: int,
+                       key: str, hash: int) -> tuple[int, bool]:
+        """
+        Probe buckets for key by double hashing, returning the same as
+        _locate_stepped.
+        """
+        index = hash % capacity
+        step = self._double_step(key, hash, capacity)
+        epoch = self._epoch
+        free = -1
+        probes = capacity
+        entry = buckets.get_unchecked(index)
+        while entry is not None:
+            if entry.is_tombstone:
+                if free < 0:
+                    free = index
+            elif entry.epoch != epoch:
+                break
+            elif entry.hash == hash and entry.key == key:
+                return index, True
+            probes -= 1
+            if probes == 0:
+                return free, False
+            index += step
+            if index >= capacity:
+                index -= capacity
+            entry = buckets.get_unchecked(index)
+        return (index if free < 0 else free), False
+
+    def _free_slot(self, buckets: DynamicArray, capacity: int, key: str,
+                   hash: int) -> int:
+        """
+        Return the first empty or tombstone bucket of the probe sequence
+        for a key that is known not to be in buckets, or -1 if the probe
+        sequence has none.
+        """
+        index, step, grow = self._probe_start(key, hash, capacity)
+        for _ in range(capacity):
+            entry = buckets.get_unchecked(index)
+            if entry is None or entry.is_tombstone or \
+                    entry.epoch != self._epoch:
+                return index
+            index += step
+            if index >= capacity:
+                index %= capacity
+            step += grow
+        return -1
+
+    def _rh_find(self, buckets: DynamicArray, capacity: int, key: str,
+                 hash: int) -> tuple[int, bool]:
+        """
+        Look key up in a Robin Hood table. Return its index and True, or -1
+        and False once an empty bucket or an entry closer to its home
+        bucket than the probe so far shows the key is absent. Tombstones
+        only occur in the old table of an incremental resize and are
+        stepped over.
+        """
+        index = hash % capacity
+        epoch = self._epoch
+        for distance in range(capacity):
+            entry = buckets.get_unchecked(index)
+            if entry is None:
+                break
+            if not entry.is_tombstone:
+                if entry.epoch != epoch:
+                    break
+                if entry.hash == hash and entry.key == key:
+                    return index, True
+                if (index - entry.hash) % capacity < distance:
+                    break
+            index += 1
+            if index == capacity:
+                index = 0
+        return -1, False
+
+    def _rh_insert(self, entry: HashEntry) -> None:
+        """
+        Add an entry whose key is not in the current Robin Hood table. Walk
+        from its home bucket and swap it with any entry that sits closer to
+        its own home, carrying that entry on until an empty bucket.
+        """
+        buckets, capacity = self._buckets, self._capacity
+        index = entry.hash % capacity
+        distance = 0
+        while True:
+            current = buckets.get_unchecked(index)
+            if current is None or current.epoch != self._epoch:
+                buckets.set_unchecked(index, entry)
+                return
+            current_distance = (index - current.hash) % capacity
+            if current_distance < distance:
+                buckets.set_unchecked(index, entry)
+                entry, distance = current, current_distance
+            index += 1
+            if index == capacity:
+                index = 0
+            distance += 1
+
+    def _rh_delete(self, index: int) -> None:
+        """
+        Delete the entry at index of the current Robin Hood table by
+        shifting each following entry that is away from its home bucket
+        back by one, so no tombstone is needed.
+        """
+        buckets, capacity = self._buckets, self._capacity
+        following = index + 1 if index + 1 < capacity else 0
+        entry = buckets.get_unchecked(following)
+        while entry is not None and entry.epoch == self._epoch and \
+                (following - entry.hash) % capacity:
+            buckets.set_unchecked(index, entry)
+            index = following
+            following = index + 1 if index + 1 < capacity else 0
+            entry = buckets.get_unchecked(following)
+        buckets.set_unchecked(index, None)
+
+    def _insert(self, entry: HashEntry) -> None:
+        """
+        Add an entry whose key is not in the current table.
+        """
+        if self._probing == 'robin_hood':
+            self._rh_insert(entry)
+        else:
+            self._place(self._free_slot(self._buckets, self._capacity,
+                                        entry.key, entry.hash), entry)
+
+    def _migrate(self, count: int) -> None:
+        """
+        Move the live entries of the next count old buckets into the
+        current table. Drop the old table once every bucket is moved.
+        """
+        old = self._old_buckets
+        stop = min(self._migrate_index + count, self._old_capacity)
+        for i in range(self._migrate_index, stop):
+            entry = old.get_unchecked(i)
+            if entry is not None:
+                # Leave a tombstone so probes through this bucket continue,
+                # freeing the dead entries as they are passed rather than
+                # all at once when the old table is dropped.
+                old.set_unchecked(i, _MIGRATED)
+                if not entry.is_tombstone and entry.epoch == self._epoch:
+                    self._insert(entry)
+        self._migrate_index = stop
+
+        if stop == self._old_capacity:
+            self._old_buckets = None
+            self._old_capacity = 0
+            self._migrate_index = 0
+
+    def _finish_migration(self) -> None:
+        """
+        Complete any incremental resize in progress.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+    def _place(self, index: int, entry: HashEntry) -> None:
+        """
+        Store entry in the free bucket at index of the current table,
+        keeping count of the tombstones it replaces.
+        """
+        previous = self._buckets.get_at_index(index)
+        if previous is not None and previous.epoch == self._epoch:
+            self._tombstones -= 1
+        self._buckets.set_at_index(index, entry)
+
+    def _resize(self, new_capacity: int) -> None:
+        """
+        Change the table to new_capacity, either at once through
+        resize_table or incrementally on later operations.
+        """
+        if not self._incremental:
+            self.resize_table(new_capacity)
+            return
+        self._start_migration(new_capacity)
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Allocate a table of new_capacity buckets and keep the current one
+        as the old table, to be moved over by later operations.
+        """
+        self._finish_migration()
+        capacity = new_capacity
+        if not self._is_prime(capacity):
+            capacity = self._next_prime(capacity)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+        self._migration_step = self.MIGRATION_STEP
+        self._buckets = self._array_type.filled(capacity)
+        self._capacity = capacity
+        self._tombstones = 0
+        self._mod_count += 1
+
+    def start_resize(self, new_capacity: int) -> None:
+        """
+        Change the capacity of table like resize_table, but only allocate
+        the new buckets now: later operations and migrate_buckets move the
+        entries over a few old buckets at a time. A resize already in
+        progress is finished first.
+        """
+        # Check if new capacity is valid and change if needed.
+        capacity = new_capacity
+        if capacity < self._size:
+            return
+        if not self._is_prime(capacity):
+            capacity = self._next_prime(capacity)
+
+        # Keep doubling while the entries would still overload the table.
+        while self._size > 0 and \
+                (self._size - 1) / capacity >= self._max_load:
+            capacity = self._grown(capacity)
+        self._start_migration(capacity)
+
+    def migrate_buckets(self, count: int) -> bool:
+        """
+        Move the entries of the next count old buckets of a resize in
+        progress into the current table. Return True if old buckets are
+        left to move.
+        """
+        if self._old_buckets is not None:
+            self._migrate(count)
+        return self._old_buckets is not None
+
     def put(self, key: str, value: object) -> None:
         """
         Update the key/value pair in the hash map. If key already exists,
         the associated value is replaced with new value. If not, both key
         and value is added.
         """
+        if self._old_buckets is not None:
+            self._migrate(self._migration_step)
+
         # Check load factor.
-        if self.table_load() >= 0.5:
-            self.resize_table(self._capacity * 2)
+        if self.table_load() >= self._max_load:
+            self._resize(self._grown(self._capacity))
+
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Update or add the key/value pair given the key's hash, without
+        checking the load factor.
+        """
+        # Update value if key is still waiting in the old table.
+        if self._old_buckets is not None:
+            index, found = self._locate(self._old_buckets,
+                                        self._old_capacity, key, hash)
+            if found:
+                self._old_buckets.get_unchecked(index).value = value
+                return
 
         # Update value or add key and value.
-        entry = HashEntry(key, value)
-        index = self._hash_function(key) % self._capacity
-        if self._buckets.get_at_index(index) is None:
-            self._buckets.set_at_index(index, entry)
+        index, found = self._locate(self._buckets, self._capacity, key, hash)
+        if found:
+            self._buckets.get_unchecked(index).value = value
+        elif index < 0:
+            self._insert(self._entry_type(key, value, hash, self._epoch))
             self._size += 1
+            self._mod_count += 1
         else:
-            counter = 0
-            while index < self._capacity:
-                newIndex = index + counter ** 2
-                if newIndex >= self._capacity:
-                    newIndex = newIndex % self._capacity
-                bucket = self._buckets.get_at_index(newIndex)
-                if bucket is None or bucket.is_tombstone:
-                    self._buckets.set_at_index(newIndex, entry)
-                    self._size += 1
-                    return
-                if bucket.key == key:
-                    bucket.value = value
-                    return
-                counter += 1
+            self._place(index, self._entry_type(key, value, hash,
+                                                self._epoch))
+            self._size += 1
+            self._mod_count += 1
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -133,21 +552,33 @@ class HashMap:
         if not self._is_prime(capacity):
             capacity = self._next_prime(capacity)
 
+        # Keep doubling while the entries would still overload the table.
+        self._finish_migration()
+        while self._size > 0 and \
+                (self._size - 1) / capacity >= self._max_load:
+            capacity = self._grown(capacity)
+
         # Change the table capacity.
         tempBuckets = self._buckets
-        self._buckets = DynamicArray()
-        for i in range(capacity):
-            self._buckets.append(None)
+        self._buckets = self._array_type.filled(capacity)
+        self._tombstones = 0
+        self._mod_count += 1
 
-        # Reassign values.
-        self._size = 0
+        # Reassign values using their stored hashes.
         oldCapacity = self._capacity
         self._capacity = capacity
         for i in range(oldCapacity):
-            entry = tempBuckets.get_at_index(i)
-            if entry is not None:
-                if not entry.is_tombstone:
-                    self.put(entry.key, entry.value)
+            entry = tempBuckets.get_unchecked(i)
+            if self._is_live(entry):
+                self._insert(entry)
+
+    def _is_live(self, entry: HashEntry) -> bool:
+        """
+        Return True if a bucket holds an entry that is neither a tombstone
+        nor left over from before the last clear.
+        """
+        return entry is not None and not entry.is_tombstone and \
+            entry.epoch == self._epoch
 
     def table_load(self) -> float:
         """
@@ -157,33 +588,53 @@ class HashMap:
 
     def empty_buckets(self) -> int:
         """
-        Return the number of empty buckets.
+        Return the number of empty buckets. Tombstones count as empty, and
+        every entry still waiting in the old table of an incremental resize
+        takes up a bucket of the current one, so this is just the capacity
+        not taken by live entries.
         """
-        count = 0
-        for i in range(self._capacity):
-            if (self._buckets.get_at_index(i) is None) or \
-                    self._buckets.get_at_index(i).is_tombstone:
-                count += 1
-        return count
+        return self._capacity - self._size
+
+    def stats(self) -> dict:
+        """
+        Return the size, capacity, empty buckets, tombstones and load factor
+        of the hash map, without scanning the table. Tombstones are
+        included in the empty buckets.
+        """
+        return {'size': self._size,
+                'capacity': self._capacity,
+                'empty_buckets': self.empty_buckets(),
+                'tombstones': self._tombstones,
+                'table_load': self.table_load()}
 
     def get(self, key: str) -> object:
         """
         Return the value associated with the given key. Return None if key
         is not in has map.
         """
-        index = self._hash_function(key) % self._capacity
-        entry = self._buckets.get_at_index(index)
-        counter = 1
-        while entry is not None:
-            # If match is found
-            if entry.key == key and not entry.is_tombstone:
-                return entry.value
-            # If not probe.
-            newIndex = index + counter ** 2
-            counter += 1
-            if newIndex >= self._capacity:
-                newIndex = newIndex % self._capacity
-            entry = self._buckets.get_at_index(newIndex)
+        hash = self._hash_function(key)
+        if self._old_buckets is None:
+            index, found = self._locate(self._buckets, self._capacity, key,
+                                        hash)
+            return self._buckets.get_unchecked(index).value if found else None
+
+        self._migrate(self._migration_step)
+        return self._get_hashed(key, hash)
+
+    def _get_hashed(self, key: str, hash: int) -> object:
+        """
+        Return the value associated with the key given its hash, or None.
+        """
+        index, found = self._locate(self._buckets, self._capacity, key, hash)
+        if found:
+            return self._buckets.get_unchecked(index).value
+
+        # Key may not have been moved to the new table yet.
+        if self._old_buckets is not None:
+            index, found = self._locate(self._old_buckets,
+                                        self._old_capacity, key, hash)
+            if found:
+                return self._old_buckets.get_unchecked(index).value
         return None
 
     def contains_key(self, key: str) -> bool:
@@ -195,73 +646,261 @@ class HashMap:
         else:
             return True
 
+    def probe_length(self, key: str) -> int:
+        """
+        Return the number of buckets examined to look up key, whether or
+        not it is found.
+        """
+        self._finish_migration()
+        hash = self._hash_function(key)
+        capacity = self._capacity
+        index, step, grow = self._probe_start(key, hash, capacity)
+        robin_hood = self._probing == 'robin_hood'
+        for counter in range(capacity):
+            entry = self._buckets.get_unchecked(index)
+            if entry is None:
+                return counter + 1
+            if not entry.is_tombstone:
+                if entry.epoch != self._epoch or \
+                        (entry.hash == hash and entry.key == key):
+                    return counter + 1
+                # Robin Hood lookups stop at an entry closer to its home.
+                if robin_hood and (index - entry.hash) % capacity < counter:
+                    return counter + 1
+            index += step
+            if index >= capacity:
+                index %= capacity
+            step += grow
+        return capacity
+
     def remove(self, key: str) -> None:
         """
         Remove key and value from hash map. If not found, do nothing.
         """
-        index = self._hash_function(key) % self._capacity
-        entry = self._buckets.get_at_index(index)
-        counter = 1
+        if self._old_buckets is not None:
+            self._migrate(self._migration_step)
+
+        self._remove_hashed(key, self._hash_function(key))
+
+    def _remove_hashed(self, key: str, hash: int) -> None:
+        """
+        Remove the key given its hash. If not found, do nothing.
+        """
         # Find index for key and remove if found.
-        while entry is not None:
-            if entry.key == key and not entry.is_tombstone:
-                entry.is_tombstone = True
+        index, found = self._locate(self._buckets, self._capacity, key, hash)
+        if found:
+            if self._probing == 'robin_hood':
+                self._rh_delete(index)
+            else:
+                self._buckets.get_unchecked(index).is_tombstone = True
+                self._tombstones += 1
+            self._size -= 1
+            self._mod_count += 1
+        elif self._old_buckets is not None:
+            index, found = self._locate(self._old_buckets,
+                                        self._old_capacity, key, hash)
+            if found:
+                self._old_buckets.get_unchecked(index).is_tombstone = True
                 self._size -= 1
-                return
-            if entry is None:
-                return
-            newIndex = index + counter ** 2
-            counter += 1
-            if newIndex >= self._capacity:
-                newIndex = newIndex % self._capacity
-            entry = self._buckets.get_at_index(newIndex)
+                self._mod_count += 1
+
+        if found and not self._shrink_if_sparse() and \
+                self._tombstone_ratio is not None and \
+                self._tombstones > self._tombstone_ratio * self._capacity:
+            if not self._incremental:
+                self.compact()
+            elif self._old_buckets is None:
+                # Compact a few buckets at a time by migrating the entries
+                # into a fresh table of the same capacity.
+                self._start_migration(self._capacity)
+
+    def _shrink_if_sparse(self) -> bool:
+        """
+        Shrink the table once its load drops below shrink_load, to a
+        capacity whose load sits halfway between shrink_load and the
+        maximum load, so a few puts or removes don't resize it again.
+        An incremental map waits for the resize in progress to finish
+        first. Return True if the table was resized.
+        """
+        # Starting a shrink mid-migration would finish the old one at once.
+        if self._shrink_load is None or self._old_buckets is not None or \
+                self._capacity <= self._min_capacity or \
+                self.table_load() >= self._shrink_load:
+            return False
+
+        target = (self._shrink_load + self._max_load) / 2
+        capacity = max(self._next_prime(math.ceil(self._size / target)),
+                       self._min_capacity)
+        if capacity >= self._capacity:
+            return False
+        self._resize(capacity)
+
+        # Move enough old buckets per operation to finish the migration
+        # before the removes that are left can bring the next shrink due.
+        if self._old_buckets is not None:
+            window = self._size - math.ceil(self._shrink_load * self._capacity)
+            self._migration_step = max(self.MIGRATION_STEP,
+                                       -(-self._old_capacity // max(window, 1)))
+        return True
+
+    def reserve(self, total: int) -> None:
+        """
+        Grow the table once so that it can hold total entries without put
+        having to resize it. Never shrinks the table.
+        """
+        if total > 0 and (total - 1) / self._capacity >= self._max_load:
+            self.resize_table(self._capacity_for(total, self._max_load))
+
+    def put_many(self, pairs) -> None:
+        """
+        Put every (key, value) pair of a DynamicArray or other iterable.
+        All keys are hashed up front and the table is grown at most once,
+        sized as if every key were new.
+        """
+        pairs = list(pairs)
+        hashes = [self._hash_function(key) for key, _ in pairs]
+        self.reserve(self._size + len(pairs))
+        for (key, value), hash in zip(pairs, hashes):
+            self._put_hashed(key, value, hash)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Return a dynamic array with the value of each key of a DynamicArray
+        or other iterable, in order, with None for keys not in hash map.
+        """
+        keys = list(keys)
+        hashes = [self._hash_function(key) for key in keys]
+        get = self._get_hashed
+        return DynamicArray([get(key, hash) for key, hash in zip(keys, hashes)])
+
+    def remove_many(self, keys) -> None:
+        """
+        Remove every key of a DynamicArray or other iterable from hash map.
+        Keys that are not found are ignored.
+        """
+        keys = list(keys)
+        hashes = [self._hash_function(key) for key in keys]
+        for key, hash in zip(keys, hashes):
+            self._remove_hashed(key, hash)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Return a dynamic array with tuples of key/value pairs stored
         in the has map.
         """
+        self._finish_migration()
         da = DynamicArray()
         # Loop through to find buckets that are not empty.
         for i in range(self._capacity):
-            entry = self._buckets.get_at_index(i)
-            if entry is not None:
-                if not entry.is_tombstone:
-                    da.append((entry.key, entry.value))
+            entry = self._buckets.get_unchecked(i)
+            if self._is_live(entry):
+                da.append((entry.key, entry.value))
         return da
 
     def clear(self) -> None:
         """
-        Clear the contents of hash map.
+        Clear the contents of hash map. With shrink_load set, the table
+        goes back to its initial capacity. Otherwise a table of at most
+        FRESH_CLEAR_CAPACITY buckets, or one at least an eighth full, gets
+        a fresh bucket array, so the old keys and values can be freed.
+        Any other table is cleared in constant time by starting a new
+        generation: entries from older ones count as empty buckets, but
+        stay referenced until new entries overwrite them or compact() or
+        a resize drops them.
         """
-        for i in range(self._capacity):
-            self._buckets.set_at_index(i, None)
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+        if self._shrink_load is not None and \
+                self._capacity > self._min_capacity:
+            self._capacity = self._min_capacity
+            self._buckets = self._array_type.filled(self._capacity)
+        elif self._capacity <= self.FRESH_CLEAR_CAPACITY or \
+                self._size * 8 >= self._capacity:
+            self._buckets = self._array_type.filled(self._capacity)
+        else:
+            self._epoch += 1
         self._size = 0
+        self._tombstones = 0
+        self._mod_count += 1
+
+    def compact(self) -> None:
+        """
+        Clear every tombstone by reinserting the live entries into the same
+        bucket array, so probe sequences are only as long as the live
+        entries make them.
+        """
+        self._finish_migration()
+        entries = []
+        for i in range(self._capacity):
+            entry = self._buckets.get_unchecked(i)
+            if entry is not None:
+                if self._is_live(entry):
+                    entries.append(entry)
+                self._buckets.set_unchecked(i, None)
+
+        self._tombstones = 0
+        self._mod_count += 1
+        for entry in entries:
+            self._insert(entry)
 
     def __iter__(self):
         """
-        Enable the hash map to iterate across itself.
+        Enable the hash map to iterate across itself. Each call returns an
+        independent iterator over the live entries, so several can run at
+        once. It also restarts the iteration of __next__.
         """
         self._index = 0
-        return self
+        return self._entries()
 
     def __next__(self):
         """
-        Return the next item in a hash map based on location of iterator.
+        Return the next item in a hash map based on location of iterator,
+        the one __next__ itself keeps and iter() restarts.
+        """
+        self._finish_migration()
+        index = self._index
+        while index < self._capacity:
+            entry = self._buckets.get_unchecked(index)
+            index += 1
+            if self._is_live(entry):
+                self._index = index
+                return entry
+        self._index = index
+        raise StopIteration
+
+    def _entries(self):
+        """
+        Yield the live entries in bucket order, without copying them. Raise
+        RuntimeError if the map is changed while the iteration is running.
+        """
+        self._finish_migration()
+        mod_count = self._mod_count
+        epoch = self._epoch
+        for entry in self._buckets:
+            if entry is not None and not entry.is_tombstone and \
+                    entry.epoch == epoch:
+                yield entry
+                if self._mod_count != mod_count:
+                    raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """
+        Return an iterator over the keys in hash map.
+        """
+        return (entry.key for entry in self._entries())
+
+    def values(self):
+        """
+        Return an iterator over the values in hash map.
         """
-        # Check index.
-        if self._index >= self._capacity:
-            raise StopIteration
+        return (entry.value for entry in self._entries())
 
-        # Get next
-        value = self._buckets.get_at_index(self._index)
-        while value is None or value.is_tombstone:
-            self._index += 1
-            if self._index >= self._capacity:
-                raise StopIteration
-            value = self._buckets.get_at_index(self._index)
-        self._index += 1
-        return value
+    def items(self):
+        """
+        Return an iterator over the (key, value) pairs in hash map.
+        """
+        return ((entry.key, entry.value) for entry in self._entries())
 
 # ------------------- BASIC TESTING ---------------------------------------- #
 
@@ -471,3 +1110,70 @@ if __name__ == "__main__":
     print(m)
     for item in m:
         print('K:', item.key, 'V:', item.value)
+
+    print("\nincremental resize example 1")
+    print("----------------------------")
+    m = HashMap(11, hash_function_2, incremental=True)
+    for i in range(100):
+        m.put('key' + str(i), i)
+        if i % 20 == 19:
+            print(m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+    print(all(m.get('key' + str(i)) == i for i in range(100)))
+
+    print("\nRobin Hood delete example 1")
+    print("---------------------------")
+    # Anagrams share a hash_function_1 value, so they probe the same buckets.
+    m = HashMap(11, hash_function_1, probing='robin_hood')
+    for word in ('abc', 'acb', 'bac', 'bca', 'd'):
+        m.put(word, word.upper())
+    print(m)
+    # Removing shifts the later entries back instead of leaving a tombstone.
+    m.remove('abc')
+    print(m)
+    print(m.get_size(), m.stats()['tombstones'], m.get('acb'), m.get('bac'),
+          m.get('bca'), m.get('d'), m.probe_length('bca'))
+
+    print("\ncompact example 1")
+    print("-----------------")
+    m = HashMap(53, hash_function_2, tombstone_ratio=None)
+    for i in range(20):
+        m.put('key' + str(i), i)
+    for i in range(0, 20, 2):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.stats()['tombstones'])
+    m.compact()
+    print(m.get_size(), m.stats()['tombstones'], m.get_capacity())
+    print(all(m.get('key' + str(i)) == (i if i % 2 else None)
+              for i in range(20)))
+
+    print("\nclear example 3")
+    print("---------------")
+    m = HashMap(11, hash_function_1, incremental=True)
+    for i in range(20):
+        m.put('key' + str(i), i)
+    m.clear()
+    for i in range(3):
+        m.put('new' + str(i), i * 10)
+    print(m.get_size(), m.get('key1'), m.stats()['tombstones'],
+          sorted((item.key, item.value) for item in m))
+
+    print("\nclear example 4")
+    print("---------------")
+    import weakref
+
+    class Value:
+        pass
+
+    # A small table frees the old values at once. A large, sparsely filled
+    # one keeps them until their buckets are reused or a resize drops them.
+    for capacity in (101, HashMap.FRESH_CLEAR_CAPACITY * 4):
+        m = HashMap(capacity, hash_function_1)
+        values = [Value() for _ in range(20)]
+        refs = [weakref.ref(value) for value in values]
+        for i, value in enumerate(values):
+            m.put('key' + str(i), value)
+        del values, value
+        m.clear()
+        print(m.get_capacity(), sum(ref() is not None for ref in refs))
+        m.resize_table(101)
+        print(m.get_capacity(), sum(ref() is not None for ref in refs))
@@ -0,0 +1,245 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: This code implements a ShardedHashMap that partitions keys
+#               across several HashMaps from hash_map_sc or hash_map_oa,
+#               each held by its own worker process, so bulk loads and
+#               lookups run on several cores. Batches are split by shard,
+#               sent to every worker before any reply is awaited, and the
+#               shards can be merged back into a single HashMap.
+
+import multiprocessing
+import os
+
+from a6_include import DynamicArray, hash_function_builtin
+from hash_map_sc import HashMap
+
+
+def _serve(connection, map_type: type, capacity: int, function,
+           options: dict) -> None:
+    """
+    Worker process loop: hold one shard and answer (method, args) requests
+    with the method's result, or the exception it raised, until None
+    arrives.
+    """
+    shard = map_type(capacity, function, **options)
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, args = request
+        try:
+            result = getattr(shard, method)(*args)
+        except Exception as error:
+            result = error
+        connection.send(result)
+    connection.close()
+
+
+class ShardedHashMap:
+    def __init__(self, shards: int = None, map_type: type = HashMap,
+                 capacity: int = 11,
+                 function: callable = hash_function_builtin,
+                 **options) -> None:
+        """
+        Initialize a map of shards empty map_type HashMaps, one per worker
+        process, defaulting to one per CPU. Each shard starts with an equal
+        share of capacity and hashes keys with function, which must be
+        picklable, like the hash functions in a6_include. Other keyword
+        options are passed to the map_type constructor.
+        Keys are routed to shards by Python's built-in hash, so they must
+        be hashable.
+        """
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self._map_type = map_type
+        self._function = function
+        self._options = options
+
+        self._connections = []
+        self._workers = []
+        for _ in range(shards):
+            connection, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_serve, daemon=True,
+                args=(child, map_type, max(capacity // shards, 1),
+                      function, options))
+            worker.start()
+            child.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+    def __enter__(self) -> "ShardedHashMap":
+        """Return the ShardedHashMap itself for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the ShardedHashMap when the with statement ends."""
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop the worker processes. The shards and their entries are lost.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+        self._connections = []
+        self._workers = []
+
+    def _shard(self, key: object) -> int:
+        """Return the index of the shard that holds key."""
+        return hash(key) % len(self._connections)
+
+    def _call(self, requests: dict) -> dict:
+        """
+        Send each shard index's (method, args) request in requests, then
+        collect the replies, so the shards work on them in parallel.
+        Return the replies by shard index, raising the first exception a
+        shard replied with.
+        """
+        if not self._connections:
+            raise ValueError("ShardedHashMap is closed")
+        for index, request in requests.items():
+            self._connections[index].send(request)
+        replies = {index: self._connections[index].recv()
+                   for index in requests}
+        for reply in replies.values():
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def _broadcast(self, method: str, *args) -> list:
+        """Call method with args on every shard and return the replies."""
+        replies = self._call({index: (method, args)
+                              for index in range(len(self._connections))})
+        return [replies[index] for index in range(len(replies))]
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Update the key/value pair in the shard that holds key, or add it
+        if key is not there.
+        """
+        self._call({self._shard(key): ('put', (key, value))})
+
+    def get(self, key: str) -> object:
+        """
+        Return the value associated with the given key. Return None if key
+        is not in hash map.
+        """
+        index = self._shard(key)
+        return self._call({index: ('get', (key,))})[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Return True if key is in hash map and False otherwise.
+        """
+        index = self._shard(key)
+        return self._call({index: ('contains_key', (key,))})[index]
+
+    def remove(self, key: str) -> None:
+        """
+        Remove key and value from hash map. If not found, do nothing.
+        """
+        self._call({self._shard(key): ('remove', (key,))})
+
+    def put_many(self, pairs) -> None:
+        """
+        Put every (key, value) pair of a DynamicArray or other iterable,
+        each shard loading its share with put_many in parallel.
+        """
+        batches = [[] for _ in self._connections]
+        shards = len(batches)
+        for pair in pairs:
+            batches[hash(pair[0]) % shards].append(pair)
+        self._call({index: ('put_many', (batch,))
+                    for index, batch in enumerate(batches) if batch})
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Return a dynamic array with the value of each key of a DynamicArray
+        or other iterable, in order, with None for keys not in hash map.
+        Each shard looks up its share with get_many in parallel.
+        """
+        keys = list(keys)
+        shards = len(self._connections)
+        routes = [hash(key) % shards for key in keys]
+        batches = [[] for _ in range(shards)]
+        for key, index in zip(keys, routes):
+            batches[index].append(key)
+        replies = self._call({index: ('get_many', (batch,))
+                              for index, batch in enumerate(batches)
+                              if batch})
+
+        # Deal each shard's values back out in the order of its keys.
+        values = {index: iter(reply) for index, reply in replies.items()}
+        return DynamicArray([next(values[index]) for index in routes])
+
+    def remove_many(self, keys) -> None:
+        """
+        Remove every key of a DynamicArray or other iterable from hash map,
+        each shard removing its share in parallel. Keys that are not found
+        are ignored.
+        """
+        batches = [[] for _ in self._connections]
+        shards = len(batches)
+        for key in keys:
+            batches[hash(key) % shards].append(key)
+        self._call({index: ('remove_many', (batch,))
+                    for index, batch in enumerate(batches) if batch})
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._broadcast('get_size'))
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array with tuples of key/value pairs stored in
+        the hash map, shard by shard.
+        """
+        pairs = []
+        for shard_pairs in self._broadcast('get_keys_and_values'):
+            pairs.extend(shard_pairs)
+        return DynamicArray(pairs)
+
+    def clear(self) -> None:
+        """
+        Clear the contents of every shard.
+        """
+        self._broadcast('clear')
+
+    def merge(self):
+        """
+        Return a single map_type HashMap holding the entries of every
+        shard, built with the same hash function and options.
+        """
+        return self._map_type.from_pairs(self.get_keys_and_values(),
+                                         self._function, **self._options)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import hash_map_oa
+
+    print("\nsharded put_many / get_many example 1")
+    print("-------------------------------------")
+    for map_type in (HashMap, hash_map_oa.HashMap):
+        with ShardedHashMap(3, map_type) as m:
+            m.put_many(('key' + str(i), i) for i in range(1000))
+            m.remove_many('key' + str(i) for i in range(0, 1000, 2))
+            m.put('extra', -1)
+            values = m.get_many(['key1', 'key2', 'extra', 'missing'])
+            print(m.get_size(), [values[i] for i in range(values.length())])
+            merged = m.merge()
+            print(type(merged).__module__, merged.get_size(),
+                  merged.get('key999'), m.contains_key('key998'))
@@ -0,0 +1,457 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Streaming counterparts of find_mode in hash_map_sc. The
+#               counters take values from any iterable or text file, one
+#               at a time, so the input never has to fit in memory:
+#               ExactCounter counts exactly and spills its counts to disk
+#               once it holds too many distinct values, while SpaceSaving
+#               and CountMinSketch keep an approximate top k in fixed
+#               memory. Each counter reports its throughput in items/sec.
+
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from array import array
+
+from a6_include import DynamicArray, hash_function_builtin
+from hash_map_sc import HashMap
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _mix(hash: int) -> int:
+    """
+    Scramble the bits of a 64-bit hash (the splitmix64 finalizer), so
+    hashes that differ only in a few bits, like those of small integers,
+    spread over partitions and sketch rows.
+    """
+    hash = (hash ^ (hash >> 30)) * 0xbf58476d1ce4e5b9 & _MASK_64
+    hash = (hash ^ (hash >> 27)) * 0x94d049bb133111eb & _MASK_64
+    return hash ^ (hash >> 31)
+
+
+def _values(source):
+    """
+    Yield the values of source. A path or an open text file yields its
+    lines without their line endings; any other iterable yields its
+    elements as they are.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source) as file:
+            yield from _values(file)
+    elif hasattr(source, 'readline'):
+        for line in source:
+            yield line.rstrip('\r\n')
+    else:
+        yield from source
+
+
+class _StreamCounter:
+    """
+    Base class of the streaming counters: feeds them values and keeps
+    track of how many they have counted and how long that took.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the item count and the time spent counting."""
+        self.items = 0
+        self.seconds = 0.0
+
+    def add(self, value: object) -> None:
+        """Count one occurrence of value."""
+        raise NotImplementedError
+
+    def update(self, source) -> int:
+        """
+        Count every value of an iterable, an open text file or the path of
+        one, and return how many were counted.
+        """
+        add = self.add
+        count = 0
+        start = time.perf_counter()
+        for value in _values(source):
+            add(value)
+            count += 1
+        self.seconds += time.perf_counter() - start
+        self.items += count
+        return count
+
+    def throughput(self) -> float:
+        """
+        Return the number of items counted per second by update, or 0.0
+        before anything is counted.
+        """
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+
+class ExactCounter(_StreamCounter):
+    """
+    Exact frequency counts over a stream. Values are counted in a HashMap
+    until it holds max_keys distinct values; the counts are then spilled
+    to one of partitions files on disk, chosen by hash, and the map starts
+    over. Results merge the files one partition at a time, so memory stays
+    bounded as long as each partition's distinct values fit in it.
+    """
+
+    def __init__(self, max_keys: int = 1000000, partitions: int = 16,
+                 function: callable = hash_function_builtin,
+                 directory: str = None) -> None:
+        """
+        Initialize an empty counter that hashes values with function and
+        spills into a temporary directory created inside directory, or the
+        system default if None.
+        """
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        if partitions < 1:
+            raise ValueError("partitions must be at least 1")
+        super().__init__()
+        self._max_keys = max_keys
+        self._partitions = partitions
+        self._function = function
+        self._directory = directory
+        self._spill_dir = None
+
+        # The map takes each value to its slot in the parallel lists of
+        # distinct values, their counts and the position they first
+        # appeared at.
+        self._map = HashMap(function=function)
+        self._distinct = []
+        self._counts = []
+        self._firsts = []
+        self._position = 0
+
+    def __enter__(self) -> "ExactCounter":
+        """Return the ExactCounter itself for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the ExactCounter when the with statement ends."""
+        self.close()
+
+    def add(self, value: object) -> None:
+        """Count one occurrence of value."""
+        distinct = self._distinct
+        slot = self._map.setdefault(value, len(distinct))
+        if slot == len(distinct):
+            if slot == self._max_keys:
+                self._map.remove(value)
+                self._spill()
+                self._map.put(value, 0)
+            distinct.append(value)
+            self._counts.append(1)
+            self._firsts.append(self._position)
+        else:
+            self._counts[slot] += 1
+        self._position += 1
+
+    def _spill(self) -> None:
+        """
+        Append the counts held in memory to their partition files and
+        empty the map.
+        """
+        if not self._distinct:
+            return
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix='hash_map_stream_',
+                                               dir=self._directory)
+
+        chunks = [[] for _ in range(self._partitions)]
+        function, partitions = self._function, self._partitions
+        for record in zip(self._distinct, self._counts, self._firsts):
+            chunks[_mix(function(record[0])) % partitions].append(record)
+        for index, chunk in enumerate(chunks):
+            if chunk:
+                with open(self._partition_path(index), 'ab') as file:
+                    pickle.dump(chunk, file, pickle.HIGHEST_PROTOCOL)
+
+        self._map.clear()
+        self._distinct.clear()
+        self._counts.clear()
+        self._firsts.clear()
+
+    def _partition_path(self, index: int) -> str:
+        """Return the path of the spill file for partition index."""
+        return os.path.join(self._spill_dir, f'{index}.pickle')
+
+    def _totals(self):
+        """
+        Yield (value, count, first position) for every distinct value
+        counted so far, one partition at a time once anything is spilled.
+        """
+        if self._spill_dir is None:
+            yield from zip(self._distinct, self._counts, self._firsts)
+            return
+
+        self._spill()
+        for index in range(self._partitions):
+            path = self._partition_path(index)
+            if not os.path.exists(path):
+                continue
+            map = HashMap(function=self._function)
+            distinct, counts, firsts = [], [], []
+            with open(path, 'rb') as file:
+                while True:
+                    try:
+                        chunk = pickle.load(file)
+                    except EOFError:
+                        break
+                    # Chunks are appended in stream order, so a value's
+                    # first record holds its first position.
+                    for value, count, first in chunk:
+                        slot = map.setdefault(value, len(distinct))
+                        if slot == len(distinct):
+                            distinct.append(value)
+                            counts.append(count)
+                            firsts.append(first)
+                        else:
+                            counts[slot] += count
+            yield from zip(distinct, counts, firsts)
+
+    def mode(self) -> tuple[DynamicArray, int]:
+        """
+        Return a tuple containing a dynamic array of the mode and the
+        frequency, exactly as find_mode would for the whole stream.
+        """
+        freq = 1
+        modes = []
+        for value, count, first in self._totals():
+            if count > freq:
+                freq = count
+                modes = [(first, value)]
+            elif count == freq:
+                modes.append((first, value))
+        modes.sort(key=lambda pair: pair[0])
+        return DynamicArray([value for _, value in modes]), freq
+
+    def top(self, k: int) -> DynamicArray:
+        """
+        Return a dynamic array with the (value, count) pairs of the k most
+        frequent values, most frequent first and ties in stream order.
+        """
+        best = heapq.nlargest(k, self._totals(),
+                              key=lambda total: (total[1], -total[2]))
+        return DynamicArray([(value, count) for value, count, _ in best])
+
+    def close(self) -> None:
+        """Delete the spill files, if any, and the counts they hold."""
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+
+class _TopCounters(_StreamCounter):
+    """
+    Base class of the approximate counters: up to k counters, each a slot
+    in parallel lists of values and counts, with a HashMap from each value
+    to its slot and a heap that finds the smallest counter.
+    """
+
+    def __init__(self, k: int, function: callable) -> None:
+        """Initialize k empty counters, hashing values with function."""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        super().__init__()
+        self._k = k
+        self._map = HashMap(function=function)
+        self._keys = []
+        self._counts = []
+
+        # Heap of (count, sequence, slot). Counts only grow, so entries are
+        # refreshed lazily when they surface at the top instead of on every
+        # increment.
+        self._heap = []
+        self._sequence = 0
+
+    def _push(self, count: int, slot: int) -> None:
+        """Add a heap entry for the counter in slot."""
+        self._sequence += 1
+        heapq.heappush(self._heap, (count, self._sequence, slot))
+
+    def _smallest(self) -> int:
+        """
+        Return the slot of the smallest counter, left at the top of the
+        heap.
+        """
+        heap, counts = self._heap, self._counts
+        while heap[0][0] != counts[heap[0][2]]:
+            slot = heap[0][2]
+            self._sequence += 1
+            heapq.heapreplace(heap, (counts[slot], self._sequence, slot))
+        return heap[0][2]
+
+    def _replace(self, slot: int, value: object, count: int) -> None:
+        """
+        Hand the smallest counter, in slot, over to value with count.
+        """
+        self._map.remove(self._keys[slot])
+        self._map.put(value, slot)
+        self._keys[slot] = value
+        self._counts[slot] = count
+        self._sequence += 1
+        heapq.heapreplace(self._heap, (count, self._sequence, slot))
+
+    def _order(self, k: int) -> list:
+        """Return the slots of the k largest counters, largest first."""
+        return sorted(range(len(self._keys)),
+                      key=lambda slot: -self._counts[slot])[:k]
+
+
+class SpaceSaving(_TopCounters):
+    """
+    Approximate heavy hitters with the Space-Saving algorithm: k counters,
+    where a value without one takes over the smallest and inherits its
+    count as the possible overestimate. Any value occurring more than
+    items / k times is guaranteed a counter.
+    """
+
+    def __init__(self, k: int = 10,
+                 function: callable = hash_function_builtin) -> None:
+        """Initialize k empty counters, hashing values with function."""
+        super().__init__(k, function)
+        self._errors = []
+
+    def add(self, value: object) -> None:
+        """Count one occurrence of value."""
+        keys = self._keys
+        slot = self._map.setdefault(value, len(keys))
+        if slot < len(keys):
+            self._counts[slot] += 1
+        elif slot < self._k:
+            keys.append(value)
+            self._counts.append(1)
+            self._errors.append(0)
+            self._push(1, slot)
+        else:
+            # setdefault gave value a slot past the last one; take over the
+            # smallest counter instead.
+            self._map.remove(value)
+            slot = self._smallest()
+            count = self._counts[slot]
+            self._errors[slot] = count
+            self._replace(slot, value, count + 1)
+
+    def top(self, k: int = None) -> DynamicArray:
+        """
+        Return a dynamic array with the (value, count, error) of the k
+        largest counters, k defaulting to all of them, largest first. The
+        true count of each value lies between count - error and count.
+        """
+        return DynamicArray([(self._keys[slot], self._counts[slot],
+                              self._errors[slot]) for slot in self._order(k)])
+
+
+class CountMinSketch(_TopCounters):
+    """
+    Approximate counts in a depth x width table of counters: each value
+    adds one to a counter per row, and its estimate is the smallest of
+    them. Estimates never undercount, and overcount by more than
+    e * items / width only with probability e ** -depth. The k values with
+    the largest estimates seen so far are kept as the top k.
+    """
+
+    def __init__(self, width: int = 1 << 14, depth: int = 4, k: int = 10,
+                 function: callable = hash_function_builtin) -> None:
+        """
+        Initialize an empty sketch, hashing values with function and
+        keeping the top k.
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be at least 1")
+        super().__init__(k, function)
+        self._width = width
+        self._depth = depth
+        self._function = function
+        self._table = array('q', bytes(8 * width * depth))
+
+    def _cells(self, value: object) -> list:
+        """
+        Return the table index of value's counter in each row, derived
+        from the two halves of one mixed hash.
+        """
+        hash = _mix(self._function(value))
+        first, step = hash & 0xffffffff, (hash >> 32) | 1
+        width = self._width
+        return [row * width + (first + row * step) % width
+                for row in range(self._depth)]
+
+    def add(self, value: object) -> None:
+        """Count one occurrence of value."""
+        table = self._table
+        estimate = None
+        for cell in self._cells(value):
+            count = table[cell] + 1
+            table[cell] = count
+            if estimate is None or count < estimate:
+                estimate = count
+
+        # The heap's smallest count is never above the smallest estimate
+        # in the top k, so a value at or below it can neither join them nor
+        # change its own.
+        keys = self._keys
+        full = len(keys) == self._k
+        if full and estimate <= self._heap[0][0]:
+            return
+        slot = self._map.get(value)
+        if slot is not None:
+            self._counts[slot] = estimate
+        elif not full:
+            self._map.put(value, len(keys))
+            keys.append(value)
+            self._counts.append(estimate)
+            self._push(estimate, len(keys) - 1)
+        else:
+            slot = self._smallest()
+            if estimate > self._counts[slot]:
+                self._replace(slot, value, estimate)
+
+    def estimate(self, value: object) -> int:
+        """Return the estimated count of value."""
+        table = self._table
+        return min(table[cell] for cell in self._cells(value))
+
+    def top(self, k: int = None) -> DynamicArray:
+        """
+        Return a dynamic array with the (value, estimate) pairs of the k
+        values with the largest estimates, k defaulting to all of them,
+        largest first.
+        """
+        return DynamicArray([(self._keys[slot], self._counts[slot])
+                             for slot in self._order(k)])
+
+
+def stream_mode(source, **options) -> tuple[DynamicArray, int]:
+    """
+    Return the mode and frequency of the values of an iterable, an open
+    text file or the path of one, like find_mode but without holding the
+    values in memory. Options are passed to ExactCounter.
+    """
+    with ExactCounter(**options) as counter:
+        counter.update(source)
+        return counter.mode()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nstream_mode example 1")
+    print("---------------------")
+    values = ["Arch", "Manjaro", "Manjaro", "Mint", "Mint", "Mint",
+              "Ubuntu", "Ubuntu", "Ubuntu"]
+    for options in ({}, {'max_keys': 2, 'partitions': 3}):
+        mode, frequency = stream_mode(values, **options)
+        print(f"Options: {options}\nMode : {mode}, Frequency: {frequency}")
+
+    print("\ntop-k example 1")
+    print("---------------")
+    stream = [str(i % 7) * (i % 3 + 1) for i in range(1000)] + ['hot'] * 300
+    with ExactCounter(max_keys=4) as exact:
+        for counter in (exact, SpaceSaving(k=4),
+                        CountMinSketch(width=64, depth=3, k=4)):
+            counter.update(stream)
+            print(type(counter).__name__, counter.top(4),
+                  counter.throughput() > 0)